@@ -37,6 +37,10 @@ export function Navbar() {
   const [showEditor, setShowEditor] = useState(false);
   const [compiledCode, setCompiledCode] = useState("");
   const editorRef = useRef<EditorRef>(null);
+  // Lets the server recompile only the blocks changed since this editor's last compile
+  const compileSessionId = useRef(crypto.randomUUID());
+  // Idempotency key of the deploy in flight, reused when the same deploy is retried before its job finishes
+  const pendingDeploy = useRef<{ intent: string; key: string } | null>(null);
   const [isDeploying, setIsDeploying] = useState(false);
   const [isVerifying, setIsVerifying] = useState(false);
   const [lastSavedCode, setLastSavedCode] = useState("");
@@ -94,9 +98,35 @@ export function Navbar() {
     };
     console.log("Deploying contract with data: " + JSON.stringify(deploymentData, null, 2));
 
-    axios.post("http://127.0.0.1:5000/deploy", deploymentData)
-      .then(response => {
-        const hash = response.data.hash;
+    const intent = JSON.stringify([network, currentCode, formattedParams]);
+    if (pendingDeploy.current?.intent !== intent) {
+      pendingDeploy.current = { intent, key: crypto.randomUUID() };
+    }
+    const deployKey = pendingDeploy.current.key;
+
+    // Deploys run as background jobs; poll the job until it finishes
+    const pollDeployJob = async (jobId: string): Promise<string> => {
+      while (true) {
+        const { data: job } = await axios.get(`http://127.0.0.1:5000/deploy/${jobId}`);
+        console.log("Deploy job status: ", job.status);
+        if (job.status === "done" || job.status === "failed") {
+          // The job is over; deploying again is a new deploy
+          if (pendingDeploy.current?.key === deployKey) pendingDeploy.current = null;
+        }
+        if (job.status === "done") return job.result.address;
+        if (job.status === "failed") {
+          console.error("Deployment failed: ", job.error);
+          return "error";
+        }
+        await new Promise(resolve => setTimeout(resolve, 2000));
+      }
+    };
+
+    axios.post("http://127.0.0.1:5000/deploy", deploymentData, {
+      headers: { "Idempotency-Key": deployKey },
+    })
+      .then(response => pollDeployJob(response.data.id))
+      .then(hash => {
         console.log("Deployment hash: ", hash, "     ", hash.length);
         
         if (hash === "error" || hash.length !== 66) {
@@ -130,7 +160,9 @@ export function Navbar() {
         toast({
           variant: "destructive",
           title: "Deployment Error",
-          description: "Failed to deploy contract. Please try again.",
+          description: error.response?.status === 429
+            ? "Too many deploys are in progress. Please try again shortly."
+            : "Failed to deploy contract. Please try again.",
         });
       })
       .finally(() => {
@@ -153,6 +185,7 @@ export function Navbar() {
       nodeData: nodes,
       edgeData: edges,
       contractName,
+      sessionId: compileSessionId.current,
     };
 
     console.log("Compiling contract with data: " + JSON.stringify(compilationData, null, 2));
@@ -179,10 +212,14 @@ export function Navbar() {
           setLastSavedCode(code);
           setHasChanges(false);
           setShowEditor(true);
+          const errors = response.data.errors || [];
+          console.log("Compilation errors: ", errors);
           toast({
             variant: "warning",
             title: "Compilation Warning",
-            description: "We tried, this is our best estimate of what you were trying to compile.",
+            description: errors.length > 0
+              ? `${errors[0].message}${errors.length > 1 ? ` (and ${errors.length - 1} more)` : ""}`
+              : "We tried, this is our best estimate of what you were trying to compile.",
           });
         }
       })
@@ -227,10 +264,15 @@ export function Navbar() {
           });
         } else {
           setOperationStatus('error');
+          const diagnostics = response.data.diagnostics || [];
+          console.log("Verification diagnostics: ", diagnostics);
+          const firstError = diagnostics.find((diagnostic: { severity: string }) => diagnostic.severity === "error");
           toast({
             variant: "warning",
             title: "Verification Failed",
-            description: "We tried, but we couldn't verify your contract. Please check your code and try again.",
+            description: firstError
+              ? `Line ${firstError.line}: ${firstError.message}`
+              : "We tried, but we couldn't verify your contract. Please check your code and try again.",
           });
         }
       })
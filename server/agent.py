@@ -1,32 +1,34 @@
 from typing import Literal, cast, Any, Callable, List, Optional
 import os
+import threading
+import uuid
+from collections import OrderedDict
 
-import requests
+import httpx
 import json
 import smtplib
 from dotenv import load_dotenv
 from langgraph.graph import END, START, StateGraph, MessagesState
-from langchain_community.vectorstores import Chroma
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import tool
-from langchain_community.document_loaders import PyMuPDFLoader
 from langgraph.prebuilt import ToolNode
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.checkpoint.memory import MemorySaver
-from langchain.chains import create_retrieval_chain
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.tools.yahoo_finance_news import YahooFinanceNewsTool
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import InjectedToolArg
 from typing_extensions import Annotated
 from langsmith import traceable
 
+from cairo_rag import format_context, get_rag_service
+from http_client import get_http_client
+
 load_dotenv()
 
+STARKNET_ID_API_URL = os.getenv('STARKNET_ID_API_URL', 'https://api.starknet.id')
+NFTSCAN_API_URL = os.getenv('NFTSCAN_API_URL', 'https://starknetapi.nftscan.com')
+
 def add(a: int, b: int) -> int:
     """Add two integers.
 
@@ -84,15 +86,14 @@ def get_data_from_starknet_id (starknet_id: str):
     """Retrieve the data of a Starknet ID.
     Arg: starknet_id
     """
-    url = "https://api.Starknet.id/id_to_data"
+    url = f"{STARKNET_ID_API_URL}/id_to_data"
     
     params = {"id": starknet_id}
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return json.dumps(response.json(), indent=4)
-    except requests.exceptions.RequestException as e:
+        client = get_http_client()
+        return json.dumps(client.run(client.get_json(url, params=params)), indent=4)
+    except (httpx.HTTPError, ValueError) as e:
         return {"error": str(e)}
     
 # get address and expiry date of a domain tool
@@ -100,15 +101,14 @@ def get_data_from_starknet_id (starknet_id: str):
 def get_address_from_starknet_domain (domain: str):
     """Retrieve the associated address and its expiry date for a given domain.
     Arg: domain"""
-    url = "https://api.starknet.id/domain_to_addr"
+    url = f"{STARKNET_ID_API_URL}/domain_to_addr"
     
     params = {"domain": domain}
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return json.dumps(response.json(), indent=4)
-    except requests.exceptions.RequestException as e:
+        client = get_http_client()
+        return json.dumps(client.run(client.get_json(url, params=params)), indent=4)
+    except (httpx.HTTPError, ValueError) as e:
         return {"error": str(e)}
     
 # get the NFT uri from a starknet id tool
@@ -116,15 +116,14 @@ def get_address_from_starknet_domain (domain: str):
 def uri_of_starknet_id (starknet_id: str):
     """Retrieve the NFT uri of a Starknet ID.
     arg: starknet_id"""
-    url = "https://api.Starknet.id/uri"
+    url = f"{STARKNET_ID_API_URL}/uri"
     
     params = {"id": starknet_id}
     
     try:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return json.dumps(response.json(), indent=4)
-    except requests.exceptions.RequestException as e:
+        client = get_http_client()
+        return json.dumps(client.run(client.get_json(url, params=params)), indent=4)
+    except (httpx.HTTPError, ValueError) as e:
         return {"error": str(e)}
 
 # get all nfts by account tool
@@ -133,7 +132,7 @@ def get_nft_by_account (account_address: str, show_attribute: bool | None = None
     """returns all NFTs owned by an account address.
     arg: account_address
     optional args: show_attribute as a bool, sort_field by mint_time, own_time, and latest_trade_price, and sort_direction as asc or desc"""
-    url = f"https://starknetapi.nftscan.com/api/v2/account/own/all/{account_address}?erc_type=&show_attribute=false&sort_field=&sort_direction="
+    url = f"{NFTSCAN_API_URL}/api/v2/account/own/all/{account_address}?erc_type=&show_attribute=false&sort_field=&sort_direction="
 
     params = {
         'show_attribute': show_attribute,
@@ -148,10 +147,9 @@ def get_nft_by_account (account_address: str, show_attribute: bool | None = None
     headers = {'X-API-KEY': netscan_api_key}
     
     try:
-        response = requests.get(url, params=params, headers=headers)
-        response.raise_for_status()
-        return json.dumps(response.json(), indent=4)
-    except requests.exceptions.RequestException as e:
+        client = get_http_client()
+        return json.dumps(client.run(client.get_json(url, params=params, headers=headers)), indent=4)
+    except (httpx.HTTPError, ValueError) as e:
         return {"error": str(e)}
 
 # search collections tool
@@ -185,7 +183,7 @@ def search_collections (
     :param symbol: Symbol to filter collections by (optional).
     :param twitter: Twitter handle to filter collections by (optional).
     :return: The response from the API."""
-    url = f"https://starknetapi.nftscan.com/api/v2/collections/filters"
+    url = f"{NFTSCAN_API_URL}/api/v2/collections/filters"
 
     payload = {
         "contract_address_list": contract_address_list,
@@ -210,119 +208,17 @@ def search_collections (
                'X-API-KEY': netscan_api_key}
 
     try:
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
-        response.raise_for_status()
-        return json.dumps(response.json(), indent=4)
-    except requests.exceptions.RequestException as e:
+        client = get_http_client()
+        return json.dumps(client.run(client.post_json(url, body=payload, headers=headers)), indent=4)
+    except (httpx.HTTPError, ValueError) as e:
         return {"error": str(e)}
 
-def cairo_rag():
-    # Get the absolute path to the script's directory
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(script_dir, "documents", "cairo_programming_language.pdf")
-    db_path = os.path.join(script_dir, "vectorstore", "db_chroma")
-    
-    print(f"Looking for PDF at: {file_path}")
-    
-    if not os.path.exists(file_path):
-        raise Exception(f"Cairo documentation PDF not found at {file_path}")
-        
-    def document_ingestion(file_path):
-        documents = []
-        pdf_reader = PyMuPDFLoader(file_path=file_path).load()
-        documents.extend(pdf_reader)
-        print("document ingested")
-        return documents
-
-    def text_splitting(documents):
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1500,
-            chunk_overlap=200,
-        )
-        chunks = text_splitter.split_documents(documents=documents)
-        print("document split into chunks")
-        return chunks
-
-    def store_into_vectorstore(chunks=None):
-        embedding_function = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-        # If vectorstore exists and no new chunks, load existing
-        if os.path.exists(db_path) and chunks is None:
-            vectordb = Chroma(persist_directory=db_path, embedding_function=embedding_function)
-            print("vectorstore loaded from local")
-        else:
-            # If no vectorstore or new chunks provided, create new one
-            if chunks is None:
-                print("Creating new vectorstore from PDF...")
-                documents = document_ingestion(file_path)
-                chunks = text_splitting(documents)
-            vectordb = Chroma.from_documents(documents=chunks, embedding=embedding_function, persist_directory=db_path)
-            print("vectorstore created and saved to local")
-            vectordb.persist()
-
-        return vectordb
-    
-    def conversation_chain(vectordb):
-        basic_retriever = vectordb.as_retriever(search_kwargs={'k': 3})
-
-        qa_system_prompt = """You are an AI assistant helping with Cairo programming questions.
-        You MUST use the provided context from the RAG system to answer questions.
-        
-        Rules:
-        1. ONLY use information from the provided context
-        2. If you can't find the answer in the context, say "I need to search the Cairo documentation" and use the cairo documentation tool
-        3. Do not make up or infer information
-        4. Be direct and specific
-        5. NEVER give general advice without using the documentation
-        
-        Context: {context}
-        Question: {input}"""
-
-        qa_prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", qa_system_prompt),
-                ("human", "{input}"),
-            ]
-        )
-
-        # groq_api_key = os.getenv('GROQ_API_KEY', None)
-        # if groq_api_key is None:
-        #     raise Exception("Groq api key not found.")
-
-        # model = ChatGroq(
-        #     model="llama-3.1-70b-versatile",
-        #     temperature=0.0,
-        #     max_tokens=8000,
-        #     api_key=groq_api_key
-        #     )
-
-        open_api_key = os.getenv('OPENAI_API_KEY', None)
-        if open_api_key is None:
-            raise Exception("OpenAI api key not found.")
-        
-        model = ChatOpenAI(
-            model="gpt-4o",
-            temperature=0,
-            timeout=None,
-            max_retries=2)
-
-        question_answer_chain = create_stuff_documents_chain(model, qa_prompt)
-        rag_chain = create_retrieval_chain(basic_retriever, question_answer_chain)
-        return rag_chain
-
-    # Main execution
-    vectorstore = store_into_vectorstore()
-    chain = conversation_chain(vectorstore)
-    return chain
-
-
 def cairo_rag_tool(query: str):
     """This tool is used to get information related to Cairo programming. This tool is to be used no matter what. Use this tool to answer any question the user asks.
     Arg: query"""
-    rag_chain = cairo_rag()
-    response = rag_chain.invoke({"input": query})
-    context = response['context']
-    document_data = str([document.page_content for document in context])
+    # Pure retrieval against the shared, already-open index; the agent's own model does the answering
+    documents = get_rag_service().retrieve(query)
+    document_data = format_context(documents)
     print(document_data)
     return document_data
 
@@ -339,26 +235,74 @@ TOOLS = {
     "cairo documentation" : cairo_rag_tool
 }   
 
-@traceable
-def invoke(requested_tools, prompt):
-    agent_tools = []
-    for tool in requested_tools:
-        if tool in TOOLS.keys():
-            agent_tools.append(TOOLS[tool])
+SYSTEM_PROMPT = """You are a helpful AI assistant specialized in Cairo programming and Starknet. 
+You have access to various tools including Cairo documentation, Starknet ID tools, and NFT tools.
+Always use the cairo documentation tool first when answering questions about Cairo programming.
+Be direct and specific in your answers. DO NOT GIVE LISTS, give short paragraphs instead specific to the user's question. Under no conditions are you to say that you do not have access to documents. Give as much hyperspecific information as posible."""
+
+class BoundedMemorySaver(MemorySaver):
+    """In-memory checkpointer that only keeps the most recently used threads."""
+
+    def __init__(self, max_threads: int):
+        super().__init__()
+        self.max_threads = max_threads
+        # Thread id -> keys of its entries in self.writes, least recently used first
+        self.thread_order = OrderedDict()
+        self.thread_lock = threading.Lock()
+
+    def put(self, config, *args, **kwargs):
+        result = super().put(config, *args, **kwargs)
+        self.touch(config["configurable"]["thread_id"])
+        return result
+
+    def put_writes(self, config, *args, **kwargs):
+        result = super().put_writes(config, *args, **kwargs)
+        configurable = config["configurable"]
+        # MemorySaver keys pending writes by (thread_id, checkpoint_ns, checkpoint_id)
+        self.touch(configurable["thread_id"], (
+            configurable["thread_id"],
+            configurable.get("checkpoint_ns", ""),
+            configurable["checkpoint_id"],
+        ))
+        return result
+
+    def touch(self, thread_id: str, write_key: tuple = None):
+        with self.thread_lock:
+            write_keys = self.thread_order.pop(thread_id, None) or set()
+            if write_key is not None:
+                write_keys.add(write_key)
+            self.thread_order[thread_id] = write_keys
+            while len(self.thread_order) > self.max_threads:
+                evicted, evicted_keys = self.thread_order.popitem(last=False)
+                self.storage.pop(evicted, None)
+                for key in evicted_keys:
+                    self.writes.pop(key, None)
+
+# Shared by every compiled graph so a session keeps its history across tool sets
+checkpointer = BoundedMemorySaver(int(os.getenv('AGENT_MAX_THREADS', 256)))
+
+_model = None
+_agent_graphs = {}
+_agent_lock = threading.Lock()
+
+def get_model():
+    global _model
+    if _model is None:
+        open_api_key = os.getenv('OPENAI_API_KEY', None)
+        if open_api_key is None:
+            raise Exception("OpenAI api key not found.")
+        
+        _model = ChatOpenAI(
+            model="gpt-4o",
+            temperature=0,
+            timeout=None,
+            max_retries=2)
+    return _model
 
+def build_agent_graph(agent_tools):
     tool_node = ToolNode(agent_tools)
 
-    open_api_key = os.getenv('OPENAI_API_KEY', None)
-    if open_api_key is None:
-        raise Exception("OpenAI api key not found.")
-    
-    model = ChatOpenAI(
-        model="gpt-4o",
-        temperature=0,
-        timeout=None,
-        max_retries=2)
-
-    model_with_tools = model.bind_tools(agent_tools)
+    model_with_tools = get_model().bind_tools(agent_tools)
 
     def should_continue_to_tool(state: MessagesState) -> Literal["tools", END]:
         messages = state['messages']
@@ -394,57 +338,82 @@ def invoke(requested_tools, prompt):
     # after tool is called, it is conditional if the agent is called
     workflow.add_conditional_edges("tools", should_continue_to_agent)
 
-    # memory
-    checkpointer = MemorySaver()
-    app = workflow.compile(checkpointer=checkpointer)
+    return workflow.compile(checkpointer=checkpointer)
 
-    # Initialize messages with system prompt and user prompt
-    initial_messages = [
-        {"role": "system", "content": """You are a helpful AI assistant specialized in Cairo programming and Starknet. 
-You have access to various tools including Cairo documentation, Starknet ID tools, and NFT tools.
-Always use the cairo documentation tool first when answering questions about Cairo programming.
-Be direct and specific in your answers. DO NOT GIVE LISTS, give short paragraphs instead specific to the user's question. Under no conditions are you to say that you do not have access to documents. Give as much hyperspecific information as posible."""},
-        {"role": "user", "content": prompt}
-    ]
+def get_agent_graph(requested_tools):
+    """Compiled graph for a tool set, built once and reused across invocations."""
+    tool_names = tuple(sorted({tool for tool in requested_tools if tool in TOOLS}))
+    with _agent_lock:
+        if tool_names not in _agent_graphs:
+            _agent_graphs[tool_names] = build_agent_graph([TOOLS[tool] for tool in tool_names])
+        return _agent_graphs[tool_names]
+
+def prepare_run(requested_tools, prompt, session_id):
+    app = get_agent_graph(requested_tools)
+
+    # Each session gets its own conversation; calls without one start fresh
+    config = {"configurable": {"thread_id": session_id or uuid.uuid4().hex}}
+
+    # Only seed the system prompt on a thread's first turn
+    initial_messages = []
+    if not app.get_state(config).values.get("messages"):
+        initial_messages.append({"role": "system", "content": SYSTEM_PROMPT})
+    initial_messages.append({"role": "user", "content": prompt})
+
+    return app, config, {"messages": initial_messages}
+
+@traceable
+def invoke(requested_tools, prompt, session_id=None):
+    app, config, inputs = prepare_run(requested_tools, prompt, session_id)
 
     response = ""
     for chunk in app.stream(
-        {"messages": initial_messages},
-        {"configurable": {"thread_id": "thread-1"}},
+        inputs,
+        config,
         stream_mode="values"):
         response = chunk["messages"][-1]
 
     return response.content
 
+def stream(requested_tools, prompt, session_id=None):
+    """Yield agent events as they happen: model tokens, tool calls, tool results and finally the answer."""
+    app, config, inputs = prepare_run(requested_tools, prompt, session_id)
+
+    answer = ""
+    for mode, chunk in app.stream(inputs, config, stream_mode=["messages", "updates"]):
+        if mode == "messages":
+            message, metadata = chunk
+            if metadata.get("langgraph_node") == "agent" and message.content:
+                yield {"type": "token", "content": message.content}
+            continue
+
+        for node, update in chunk.items():
+            for message in (update or {}).get("messages", []):
+                if node == "agent":
+                    for tool_call in getattr(message, "tool_calls", []):
+                        yield {"type": "tool_call", "name": tool_call["name"], "args": tool_call["args"]}
+                elif node == "tools":
+                    yield {"type": "tool_result", "name": message.name, "content": message.content}
+                answer = message.content
+
+    yield {"type": "done", "answer": answer, "session_id": config["configurable"]["thread_id"]}
+
 if __name__ == "__main__":
 
     # response = invoke(["add", "starknet_id_data", "starknet_domain_data", "nft_uri", "nft by account", "search collections", "cairo documentation"], "what are the best ways to make smart contracts in Cairo?")
     # print(response)
 
-    print("Testing Cairo RAG system...")
+    print("Testing Cairo documentation tool...")
     
-    # Test the Cairo documentation RAG system directly
+    # Test the Cairo documentation retrieval directly
     test_query = "How do I make a storage variable in Cairo?"
     print(f"\nQuery: {test_query}")
     print("\nSearching Cairo documentation...")
     
     try:
-        rag_chain = cairo_rag()
-        response = rag_chain.invoke({"input": test_query})
-        
-        print("\nContext from RAG system:")
-        for i, doc in enumerate(response["context"]):
-            print(f"\nDocument {i+1}:")
-            print(doc.page_content)
-            print("-" * 80)
-            
-        print("\nFinal Answer:")
-        print(response["answer"])
+        cairo_rag_tool(test_query)
         
     except Exception as e:
         print(f"\nError occurred during testing: {e}")
         import traceback
         traceback.print_exc()
-
-    
-    
\ No newline at end of file
@@ -1,14 +1,21 @@
-from flask import Flask
+from flask import Flask, Response, stream_with_context
 from flask_cors import CORS
-# from agent import invoke
-from cairo_rag import query_cairo_docs
+from agent import stream as stream_agent
+from cairo_rag import query_cairo_docs, stream_cairo_docs, start_warm_up, get_rag_service
 from flask import request
 
-from deployer import handle_deploy_request, save_code_to_file, handle_verify_request
+from deployer import handle_verify_request
+from deploy_jobs import DeployQueueFull, get_deploy_queue
+from deployment_registry import QUERY_FIELDS, get_deployment_registry
 import os
 from flask import request
-from contract_builder import ContractBuilder
+from contract_builder import ContractBuilder, GraphValidationError
 from block_builder_agent import get_block_structure
+from compile_cache import get_compile_cache
+from compile_sessions import get_compile_sessions
+from batch_compile import compile_batch
+from compile_workers import get_compile_pool
+from utils import parse_constructor_args, sse_event
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*", "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"], "allow_headers": "*"}})
 
@@ -28,6 +35,7 @@ def chatbot():
         response_data = {
             "answer": result["answer"],
             "context": [doc.page_content for doc in result["context"]],
+            "cached": result.get("cached", False),
             "success": True
         }
         print(f"Sending response data: {response_data}")
@@ -43,33 +51,90 @@ def chatbot():
         print(f"Error in chatbot endpoint: {str(e)}")
         return error_response
 
+def event_stream(events):
+    def generate():
+        try:
+            for event in events:
+                yield sse_event(event)
+        except Exception as e:
+            print(f"Error while streaming: {str(e)}")
+            yield sse_event({"type": "error", "error": str(e)})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/chatbot/stream', methods=['POST'])
+def chatbot_stream():
+    data = request.get_json(force=True)
+    prompt = data.get('prompt')
+    force_regenerate = data.get('force_regenerate', False)
+    print(f"Received streaming request - Prompt: {prompt}")
+    return event_stream(stream_cairo_docs(prompt, force_regenerate=force_regenerate))
+
+@app.route('/agent/stream', methods=['POST'])
+def agent_stream():
+    data = request.get_json(force=True)
+    prompt = data.get('prompt')
+    tools = data.get('tools', [])
+    session_id = data.get('session_id')
+    print(f"Received agent request - Prompt: {prompt}, Tools: {tools}")
+    return event_stream(stream_agent(tools, prompt, session_id=session_id))
+
+@app.route('/chatbot/cache', methods=['GET'])
+def chatbot_cache():
+    return get_rag_service().answer_cache.stats()
+
 @app.route('/deploy', methods=['POST'])
 def deploy():
     data = request.get_json(force=True)
     print(data)
     network = data.get('network')
-    code = data.get('code')
-    args = extract_constructor_args(data.get("constructor_args", []))
+    code = data.get('code') or ""
+    args = parse_constructor_args(data.get("constructor_args", []))
     print(f"Args: {args}")
     # Extract contract name from code by finding "mod {name}"
     contract_name = code.split("mod ")[1].split(" ")[0] if "mod " in code else "-error-"
     contract_name = contract_name.strip()
     if contract_name == "-error-":
         print("No contract name found")
-        return {"hash": "error"}
+        return {"status": "failed", "error": "No contract name found"}, 400
     print("Contract name: \"",contract_name,"\"")
+
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
     try:
-        if code == "":
-            raise ValueError("No code provided")
-        print("Attempting to deploy contract")
-        save_code_to_file(code)
-        result = handle_deploy_request(network, contract_name, args)
-        print("Deployment result: ", result)
-        return {"hash": result}
-    except Exception as e:
-        print(f"Error during deployment: {str(e)}")
-        return {"hash": "error"}
-        
+        job, created = get_deploy_queue().submit({
+            'network': network,
+            'contract_name': contract_name,
+            'constructor_args': args,
+            'code': code,
+            'user_id': data.get('user_id'),
+        }, idempotency_key=idempotency_key)
+    except DeployQueueFull as e:
+        print(f"Rejected deploy: {e}")
+        return {"status": "failed", "error": "Too many deploys in progress, try again shortly"}, 429
+    print(f"Deploy job {job['id']} {'queued' if created else 'already submitted'}")
+    return job, 202 if created else 200
+
+@app.route('/deploy/<job_id>', methods=['GET'])
+def deploy_status(job_id):
+    job = get_deploy_queue().get(job_id)
+    if job is None:
+        return {"error": "Unknown deploy job"}, 404
+    return job
+
+@app.route('/deployments', methods=['GET'])
+def deployments():
+    filters = {field: request.args.get(field) for field in QUERY_FIELDS}
+    try:
+        limit = min(int(request.args.get('limit', 50)), 500)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return {"error": "limit and offset must be integers"}, 400
+    return {"deployments": get_deployment_registry().find(limit=limit, offset=offset, **filters)}
+
 @app.route('/generate-blocks', methods=['POST'])
 def generate_blocks():
     data = request.get_json(force=True)
@@ -114,28 +179,48 @@ def compile():
     data = request.get_json(force=True)
     print(data)
     contract_name = data.get('contractName')
-    contract_builder = ContractBuilder(data)
-    
-    # Ensure the src directory exists
-    os.makedirs('src', exist_ok=True)
-    success = True
+    cache = get_compile_cache()
+    cache_key = cache.key(data, contract_name)
+    entry = cache.get(cache_key)
+    if entry is not None:
+        print("Serving compiled contract from cache")
+        return {**entry, "success": True}
+
+    # Rebuild only the blocks that changed since this editor session's last compile
+    session_id = data.get('sessionId')
+    sessions = get_compile_sessions()
+    previous = sessions.get(session_id) if session_id else None
+
     try:
-        contract_builder.invoke(contract_name)
-        print("Invoke works")
+        builder = ContractBuilder(data, previous=previous)
+        contract_code = builder.generate(contract_name)
+        if session_id:
+            sessions.put(session_id, builder)
+        entry = {"code": contract_code, "sourceMap": builder.sourceMap, "warnings": builder.issues}
+        cache.put(cache_key, entry)
         print("RETURNING COMPILATION SUCCESS")
+        return {**entry, "success": True}
+    except GraphValidationError as e:
+        print(f"Rejected invalid block graph: {str(e)}")
+        return {"code": "womp womp", "success": False, "errors": e.errors}
     except Exception as e:
         print(f"Error during compilation: {str(e)}")
         print("RETURNING COMPILATION FAILURE")
-        success = False
+        return {"code": "womp womp", "success": False}
 
-    # Always try to read the file, regardless of whether compilation succeeded
-    try:
-        with open('src/lib.cairo', 'r') as file:
-            contract_code = file.read()
-        return {"code": contract_code, "success": success}
-    except Exception as file_error:
-        print(f"Error reading file: {str(file_error)}")
-        return {"code": "womp womp", "success": success}
+@app.route('/compile/batch', methods=['POST'])
+def compile_batch_endpoint():
+    data = request.get_json(force=True)
+    graphs = data.get('graphs')
+    if not isinstance(graphs, list):
+        return {"error": "graphs must be a list of block graphs"}, 400
+    max_graphs = int(os.getenv('COMPILE_BATCH_MAX_GRAPHS', 500))
+    if len(graphs) > max_graphs:
+        return {"error": f"At most {max_graphs} graphs can be compiled in one batch"}, 400
+
+    batch = compile_batch(graphs)
+    print(f"Batch compiled {batch['stats']['succeeded']}/{batch['stats']['graphs']} graphs in {batch['stats']['seconds']:.3f}s")
+    return batch
 
 @app.route('/verify', methods=['POST'])
 def verify():
@@ -145,13 +230,16 @@ def verify():
         if code == "":
             raise ValueError("No code provided")
         print("Attempting to verify contract")
-        save_code_to_file(code)
-        result = handle_verify_request()
-        print("Deployment result: ", result)
-        return {"success": result}
+        result = handle_verify_request(code, data)
+        print("Verification result: ", result)
+        return result
     except Exception as e:
-        print(f"Error during deployment: {str(e)}")
-        return {"success": False}
+        print(f"Error during verification: {str(e)}")
+        return {"success": False, "diagnostics": []}
 
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    # With the debug reloader only the child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warm_up()
+        get_compile_pool()
+    app.run(host="0.0.0.0", port=5000, debug=True, threaded=True)
\ No newline at end of file
@@ -0,0 +1,157 @@
+import contextlib
+import glob
+import io
+import json
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from compile_cache import get_compile_cache
+from contract_builder import ContractBuilder, GraphValidationError
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def compile_graph(graph: dict) -> dict:
+    """Generate Cairo for one block graph; runs in a pool process."""
+    try:
+        # ContractBuilder logs every function node; keep batch output readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            builder = ContractBuilder(graph)
+            code = builder.generate(graph.get('contractName'))
+        return {'success': True, 'code': code, 'sourceMap': builder.sourceMap, 'warnings': builder.issues}
+    except GraphValidationError as e:
+        return {'success': False, 'error': str(e), 'errors': e.errors}
+    except Exception as e:
+        return {'success': False, 'error': f"{type(e).__name__}: {e}"}
+
+
+class BatchCompiler:
+    """Compiles many block graphs at once across a pool of processes.
+
+    Graphs already in the compile cache are answered from it; the rest are
+    split into chunks over the pool's processes (identical graphs are
+    compiled once) and the results cached. Results come back in request
+    order, one per graph.
+    """
+
+    def __init__(self, processes: int, cache=None):
+        self.processes = processes
+        self.cache = cache
+        # Spawn rather than fork: the server is multi-threaded, and a forked
+        # worker could inherit a lock (language map, compile cache) held by
+        # another thread and deadlock on its first build
+        self.executor = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+
+    def compile(self, graphs: list) -> dict:
+        start = time.perf_counter()
+        results = [None] * len(graphs)
+        keys = [None] * len(graphs)
+        misses = []
+        duplicates = {}
+        cached = 0
+        for index, graph in enumerate(graphs):
+            if not isinstance(graph, dict):
+                results[index] = {'success': False, 'cached': False, 'error': "Each graph must be an object"}
+                continue
+            if self.cache is not None:
+                try:
+                    keys[index] = self.cache.key(graph, graph.get('contractName'))
+                except Exception as e:
+                    # Malformed graph (e.g. nodeData not a list); fail it alone, not the batch
+                    results[index] = {'success': False, 'cached': False, 'error': f"{type(e).__name__}: {e}"}
+                    continue
+                entry = self.cache.get(keys[index])
+                if entry is not None:
+                    results[index] = {'success': True, 'cached': True, **entry}
+                    cached += 1
+                    continue
+                if keys[index] in duplicates:
+                    duplicates[keys[index]].append(index)
+                    continue
+                duplicates[keys[index]] = []
+            misses.append(index)
+
+        if len(misses) == 1:
+            # Not worth the round-trip to a worker process
+            compiled = [compile_graph(graphs[misses[0]])]
+        else:
+            chunksize = max(1, math.ceil(len(misses) / (self.processes * 4)))
+            compiled = self.executor.map(compile_graph, [graphs[index] for index in misses], chunksize=chunksize)
+        for index, result in zip(misses, compiled):
+            if result['success'] and self.cache is not None:
+                self.cache.put(keys[index], {'code': result['code'], 'sourceMap': result['sourceMap'], 'warnings': result['warnings']})
+            results[index] = {'cached': False, **result}
+            for duplicate in duplicates.get(keys[index], []):
+                results[duplicate] = results[index]
+
+        seconds = time.perf_counter() - start
+        succeeded = sum(1 for result in results if result['success'])
+        return {
+            'results': results,
+            'stats': {
+                'graphs': len(graphs),
+                'succeeded': succeeded,
+                'failed': len(graphs) - succeeded,
+                'cached': cached,
+                'processes': self.processes,
+                'seconds': seconds,
+                'graphs_per_second': len(graphs) / seconds if seconds > 0 else None,
+            },
+        }
+
+    def close(self):
+        self.executor.shutdown()
+
+
+_batch_compiler = None
+_batch_compiler_lock = threading.Lock()
+
+
+def get_batch_compiler() -> BatchCompiler:
+    global _batch_compiler
+    with _batch_compiler_lock:
+        if _batch_compiler is None:
+            _batch_compiler = BatchCompiler(
+                int(os.getenv('COMPILE_BATCH_PROCESSES', os.cpu_count() or 1)),
+                cache=get_compile_cache()
+            )
+        return _batch_compiler
+
+
+def compile_batch(graphs: list) -> dict:
+    """Compile a list of block graphs (each with its contractName) and report throughput."""
+    return get_batch_compiler().compile(graphs)
+
+
+if __name__ == "__main__":
+    # Compile every example graph (or the given files), e.g. as a CI check. The
+    # sample*.json files include graphs that are deliberately invalid, so they
+    # are only compiled when passed explicitly
+    paths = sys.argv[1:] or sorted(glob.glob(os.path.join(SERVER_DIR, 'example_jsons', '*.json')))
+    graphs = []
+    for path in paths:
+        with open(path, 'r') as file:
+            graph = json.load(file)
+        name = os.path.splitext(os.path.basename(path))[0]
+        if not graph.get('contractName'):
+            graph['contractName'] = ''.join(part.capitalize() for part in name.split('_'))
+        graphs.append(graph)
+
+    compiler = BatchCompiler(int(os.getenv('COMPILE_BATCH_PROCESSES', os.cpu_count() or 1)))
+    try:
+        batch = compiler.compile(graphs)
+    finally:
+        compiler.close()
+
+    for path, result in zip(paths, batch['results']):
+        status = "ok" if result['success'] else f"failed: {result['error']}"
+        print(f"{os.path.relpath(path, SERVER_DIR)}: {status}")
+    stats = batch['stats']
+    print(f"{stats['succeeded']}/{stats['graphs']} compiled in {stats['seconds']:.3f}s "
+          f"({stats['graphs_per_second']:.1f} graphs/s on {stats['processes']} processes)")
+    sys.exit(0 if stats['failed'] == 0 else 1)
@@ -0,0 +1,62 @@
+import contextlib
+import io
+import sys
+import time
+
+from contract_builder import ContractBuilder
+
+
+def synthetic_graph(num_nodes: int) -> dict:
+    # Each storage group is a storage var, its type, a getter and a setter;
+    # each event group is an event, a struct and one typed field.
+    nodes = []
+    edges = []
+
+    def add_node(node_id, node_type, data):
+        nodes.append({"id": node_id, "type": node_type, "data": data,
+                      "position": {"x": 0, "y": 0}})
+
+    def add_edge(source, target):
+        edges.append({"id": f"xy-edge__{source}-{target}", "type": "custom",
+                      "source": source, "target": target})
+
+    group = 0
+    while len(nodes) < num_nodes:
+        if group % 4 == 3:
+            add_node(f"eventNode_{group}", "eventNode", {"type": "EVENT", "label": "Event", "identifier": ""})
+            add_node(f"struct_{group}", "struct", {"type": "STRUCT", "label": "Struct", "identifier": "", "name": f"Event{group}"})
+            add_node(f"typedVariable_{group}", "typedVariable", {"type": "TYPED_VAR", "label": f"field_{group}", "identifier": ""})
+            add_node(f"primitive_{group}", "primitive", {"type": "PRIM_TYPE", "label": "Primitive", "identifier": "u64"})
+            add_edge(f"struct_{group}", f"eventNode_{group}")
+            add_edge(f"typedVariable_{group}", f"struct_{group}")
+            add_edge(f"primitive_{group}", f"typedVariable_{group}")
+        else:
+            add_node(f"storage_{group}", "storage", {"type": "STORAGE_VAR", "label": "Storage", "identifier": "", "storage_variable": f"var_{group}"})
+            add_node(f"primitive_{group}", "primitive", {"type": "PRIM_TYPE", "label": "Primitive", "identifier": "u128"})
+            add_node(f"getFunction_{group}", "getFunction", {"type": "FUNCTION", "label": "Get", "identifier": "GET", "name": f"get_{group}"})
+            add_node(f"setFunction_{group}", "setFunction", {"type": "FUNCTION", "label": "Set", "identifier": "SET", "name": f"set_{group}"})
+            add_edge(f"primitive_{group}", f"storage_{group}")
+            add_edge(f"storage_{group}", f"getFunction_{group}")
+            add_edge(f"storage_{group}", f"setFunction_{group}")
+        group += 1
+
+    return {"contractName": "Bench", "nodeData": nodes, "edgeData": edges}
+
+
+def time_compile(graph: dict) -> float:
+    # generate() validates, generates and emits, as /compile does
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ContractBuilder(graph).generate(graph["contractName"])
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 2500, 5000, 10000, 20000, 80000]
+
+    print(f"{'nodes':>8} {'edges':>8} {'seconds':>10} {'us/node':>10}")
+    for size in sizes:
+        graph = synthetic_graph(size)
+        elapsed = min(time_compile(graph) for _ in range(3))
+        numNodes = len(graph["nodeData"])
+        print(f"{numNodes:>8} {len(graph['edgeData']):>8} {elapsed:>10.4f} {elapsed / numNodes * 1e6:>10.2f}")
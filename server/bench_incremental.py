@@ -0,0 +1,42 @@
+import contextlib
+import copy
+import io
+import sys
+import time
+
+from bench_contract_builder import synthetic_graph
+from contract_builder import ContractBuilder
+
+
+def generate(graph: dict, previous: ContractBuilder = None, changedNodeIds=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        builder = ContractBuilder(graph, previous=previous, changedNodeIds=changedNodeIds)
+        code = builder.generate(graph.get('contractName') or 'Bench')
+    return builder, code
+
+
+def time_edit(size: int, runs: int = 5) -> tuple:
+    graph = synthetic_graph(size)
+    previous, _ = generate(graph)
+    edited = copy.deepcopy(graph)
+    primitive = next(node for node in edited['nodeData'] if node['data']['type'] == 'PRIM_TYPE')
+    primitive['data']['identifier'] = 'u8'
+
+    full = min(timed(lambda: generate(edited)) for _ in range(runs))
+    diffed = min(timed(lambda: generate(edited, previous)) for _ in range(runs))
+    given = min(timed(lambda: generate(edited, previous, {primitive['id']})) for _ in range(runs))
+    return len(graph['nodeData']), full, diffed, given
+
+
+def timed(run) -> float:
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [1000, 5000, 20000]
+    print(f"{'nodes':>8} {'full (s)':>10} {'diffed (s)':>11} {'given (s)':>10}")
+    for size in sizes:
+        numNodes, full, diffed, given = time_edit(size)
+        print(f"{numNodes:>8} {full:>10.4f} {diffed:>11.4f} {given:>10.4f}")
@@ -0,0 +1,39 @@
+import json
+import sys
+import timeit
+
+from language_map import LANGUAGE_FILE, compile_template, get_language_map
+
+VALUES = {'functionName': 'get_balance', 'storageVarName': 'balance', 'storageVarType': 'u256', 'amount': '1'}
+
+
+def render_with_replace(template: dict, values: dict) -> list:
+    # The old path: one str.replace per placeholder per line
+    processedTemplate = []
+    for line in template['template']:
+        line = line.replace("{functionName}", values['functionName'])
+        line = line.replace("{storageVarName}", values['storageVarName'])
+        line = line.replace("{storageVarType}", values['storageVarType'])
+        line = line.replace("{amount}", values['amount'])
+        processedTemplate.append(line)
+    return processedTemplate
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    languageMap = get_language_map()
+
+    print(f"{'function':>10} {'replace (us)':>13} {'renderer (us)':>14}")
+    for identifier, template in languageMap['type']['FUNCTION'].items():
+        render = compile_template(tuple(template['template']))
+        assert render(VALUES) == render_with_replace(template, VALUES)
+        old = min(timeit.repeat(lambda: render_with_replace(template, VALUES), number=number, repeat=3)) / number
+        new = min(timeit.repeat(lambda: render(VALUES), number=number, repeat=3)) / number
+        print(f"{identifier:>10} {old * 1e6:>13.3f} {new * 1e6:>14.3f}")
+
+    # Loading language.json per request versus the cached, mtime-checked map
+    with open(LANGUAGE_FILE, 'r') as file:
+        source = file.read()
+    load = min(timeit.repeat(lambda: json.loads(source), number=number // 10, repeat=3)) / (number // 10)
+    cached = min(timeit.repeat(get_language_map, number=number // 10, repeat=3)) / (number // 10)
+    print(f"language.json: parse {load * 1e6:.2f} us, cached lookup {cached * 1e6:.2f} us")
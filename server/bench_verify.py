@@ -0,0 +1,72 @@
+import contextlib
+import glob
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from compile_workers import CompilePool
+from contract_builder import ContractBuilder
+from workspace import SERVER_DIR, WorkspacePool
+
+
+def example_sources() -> list:
+    sources = []
+    for path in sorted(glob.glob(os.path.join(SERVER_DIR, 'example_jsons', '*.json'))):
+        with open(path, 'r') as file:
+            graph = json.load(file)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sources.append(ContractBuilder(graph).generate(graph.get('contractName') or 'Bench'))
+    return sources
+
+
+def percentiles(samples: list) -> tuple:
+    quantiles = statistics.quantiles(samples, n=20, method='inclusive')
+    return statistics.median(samples), quantiles[18]
+
+
+def time_script(workspace_pool: WorkspacePool, code: str) -> float:
+    # The old path: a scratch project and a cold `bash verifier.sh`
+    workspace = workspace_pool.create()
+    try:
+        start = time.perf_counter()
+        workspace.write_source(code)
+        subprocess.run(['bash', os.path.join(SERVER_DIR, 'verifier.sh')], capture_output=True, cwd=workspace.path)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(workspace.path, ignore_errors=True)
+
+
+def time_pool(compile_pool: CompilePool, code: str) -> float:
+    start = time.perf_counter()
+    compile_pool.build(code)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    sources = example_sources()
+    # A different comment per run makes every build a real rebuild, like an edited contract
+    variants = [f"{sources[run % len(sources)]}\n// run {run}\n" for run in range(runs)]
+
+    workspace_pool = WorkspacePool()
+    compile_pool = CompilePool(1, workspace_pool)
+    try:
+        # Let the worker fetch dependencies and populate its cache before timing
+        compile_pool.build(sources[0])
+        results = {
+            'verifier.sh': [time_script(workspace_pool, code) for code in variants],
+            'compile pool': [time_pool(compile_pool, code) for code in variants],
+        }
+    finally:
+        compile_pool.close()
+        workspace_pool.cleanup()
+
+    print(f"{'path':>14} {'runs':>6} {'p50 (s)':>10} {'p95 (s)':>10}")
+    for name, samples in results.items():
+        p50, p95 = percentiles(samples)
+        print(f"{name:>14} {len(samples):>6} {p50:>10.3f} {p95:>10.3f}")
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Project files that, together with the source, determine the build output
+PROJECT_FILES = ['Scarb.toml', 'Scarb.lock']
+
+
+def copy_artifacts(source_dir: str, target_dir: str):
+    """Replace the build artifacts (top-level files) in target_dir with those in source_dir."""
+    os.makedirs(target_dir, exist_ok=True)
+    for name in os.listdir(target_dir):
+        path = os.path.join(target_dir, name)
+        if os.path.isfile(path):
+            os.remove(path)
+    for name in os.listdir(source_dir):
+        path = os.path.join(source_dir, name)
+        if os.path.isfile(path) and name != 'result.json':
+            shutil.copy2(path, os.path.join(target_dir, name))
+
+
+class BuildCache:
+    """Scarb build results and Sierra/CASM artifacts keyed by source hash.
+
+    Only successful builds are cached: a failure may come from the
+    environment (a missing dependency, a killed process) rather than the
+    source, and rebuilding a broken contract is cheap next to the user
+    fixing it. Each entry is a directory holding result.json (success flag
+    and build output) and the files scarb left in target/dev. Entries are
+    evicted least-recently-used first once their total size
+    exceeds `max_bytes`.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, project_dir: str = SERVER_DIR):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.project_dir = project_dir
+        self.lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, code: str) -> str:
+        digest = hashlib.sha256()
+        for name in PROJECT_FILES:
+            path = os.path.join(self.project_dir, name)
+            if os.path.exists(path):
+                with open(path, 'rb') as file:
+                    digest.update(file.read())
+            digest.update(b"\0")
+        digest.update(code.encode())
+        return digest.hexdigest()
+
+    def entry_dir(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def restore(self, key: str, target_dir: str = None):
+        """Return a cached build result, or None on a miss.
+
+        When target_dir is given the cached artifacts are copied into it.
+        """
+        entry_dir = self.entry_dir(key)
+        result_path = os.path.join(entry_dir, 'result.json')
+        try:
+            with open(result_path, 'r') as file:
+                result = json.load(file)
+            if not result.get('success'):
+                # Left by an older server that also cached failures
+                return None
+            if target_dir is not None:
+                copy_artifacts(entry_dir, target_dir)
+            os.utime(result_path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return result
+
+    def put(self, key: str, result: dict, target_dir: str):
+        if not result.get('success'):
+            return
+        entry_dir = self.entry_dir(key)
+        tmp_dir = os.path.join(self.directory, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp_dir)
+        if os.path.isdir(target_dir):
+            copy_artifacts(target_dir, tmp_dir)
+        with open(os.path.join(tmp_dir, 'result.json'), 'w') as file:
+            json.dump(result, file)
+
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another request cached the same source first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        with self.lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.directory):
+                entry_dir = os.path.join(self.directory, name)
+                result_path = os.path.join(entry_dir, 'result.json')
+                if name.startswith('.') or not os.path.exists(result_path):
+                    continue
+                size = sum(
+                    os.path.getsize(os.path.join(entry_dir, file_name))
+                    for file_name in os.listdir(entry_dir)
+                )
+                entries.append((os.path.getmtime(result_path), size, entry_dir))
+                total += size
+
+            entries.sort()
+            for _, size, entry_dir in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                total -= size
+
+
+_build_cache = None
+_build_cache_lock = threading.Lock()
+
+
+def get_build_cache() -> BuildCache:
+    global _build_cache
+    with _build_cache_lock:
+        if _build_cache is None:
+            _build_cache = BuildCache(
+                os.getenv('BUILD_CACHE_DIR', os.path.join(SERVER_DIR, '.build_cache')),
+                max_bytes=int(os.getenv('BUILD_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+            )
+        return _build_cache
@@ -0,0 +1,225 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Node and edge ids a piece of generated code came from ({'node_ids': [...], 'edge_ids': [...]})
+Source = Optional[Dict[str, List[str]]]
+
+
+@dataclass
+class Param:
+    name: str
+    type: str
+
+
+@dataclass
+class Function:
+    """A contract function: a structured signature plus body lines.
+
+    Body lines are relative to the function (they carry their own leading
+    tab, as written in language.json templates). `external` functions are
+    declared in the interface and implemented in the ABI impl block.
+    """
+    name: str
+    self_mode: str  # 'ref' (ref self: ContractState) or 'snapshot' (self: @ContractState)
+    params: List[Param]
+    return_type: Optional[str]
+    body: List[str]
+    attributes: List[str] = field(default_factory=list)
+    brace_on_new_line: bool = False
+    external: bool = True
+    source: Source = None
+
+    def self_param(self, state_type: str = 'ContractState') -> str:
+        return f"ref self: {state_type}" if self.self_mode == 'ref' else f"self: @{state_type}"
+
+    def signature(self, state_type: str = 'ContractState') -> str:
+        params = ", ".join([self.self_param(state_type)] + [f"{param.name}: {param.type}" for param in self.params])
+        return_type = f" -> {self.return_type}" if self.return_type else ""
+        return f"fn {self.name}({params}){return_type}"
+
+    def lines(self) -> List[str]:
+        header = self.signature()
+        if self.brace_on_new_line:
+            return self.attributes + [header, "{"] + self.body + ["}"]
+        return self.attributes + [f"{header} {{"] + self.body + ["}"]
+
+
+@dataclass
+class StorageVar:
+    name: str
+    type: str
+    source: Source = None
+
+
+@dataclass
+class StructField:
+    name: str
+    type: str
+    source: Source = None
+
+
+@dataclass
+class Struct:
+    name: str
+    derives: List[str]
+    fields: List[StructField]
+    source: Source = None
+
+
+@dataclass
+class EventVariant:
+    name: str
+    source: Source = None
+
+
+@dataclass
+class ContractModule:
+    name: str
+    storage_traits: List[str]
+    storage: List[StorageVar]
+    structs: List[Struct]
+    constructor: Optional[Function]
+    events: List[EventVariant]
+    functions: List[Function]
+    has_events: bool = False
+    # Paths of the types used that aren't in the prelude, e.g. starknet::ContractAddress
+    imports: List[str] = field(default_factory=list)
+
+    def types(self) -> List[str]:
+        """Every type written in the contract's storage, structs and signatures."""
+        types = [var.type for var in self.storage]
+        types.extend(struct_field.type for struct in self.structs for struct_field in struct.fields)
+        for function in self.functions + ([self.constructor] if self.constructor else []):
+            types.extend(param.type for param in function.params)
+            if function.return_type:
+                types.append(function.return_type)
+        return types
+
+
+class CairoEmitter:
+    """Writes a ContractModule as Cairo source into one buffer, in a single pass.
+
+    Every line is written once with its final indentation, and the source
+    map (see ContractBuilder.build) is collected along the way. `block`
+    indentation applies to every physical line of a multi-line text such
+    as a code block, `indent` only to the first.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self.line_number = 1
+        self.source_map = []
+        self.last_range = None
+
+    def write(self, text: str, source: Source = None, block: int = 0, indent: int = 0):
+        newlines = text.count("\n")
+        if block and newlines:
+            text = text.replace("\n", "\n" + "\t" * block)
+        if block or indent:
+            text = "\t" * (block + indent) + text
+        self.buffer.append(text)
+
+        line_number = self.line_number
+        self.line_number = line_number + newlines + 1
+        if not source:
+            return
+        end = {'line': line_number + newlines, 'column': len(text) - text.rfind("\n")}
+        previous = self.last_range
+        if previous is not None and previous['end']['line'] == line_number - 1 and \
+                previous['node_ids'] == source['node_ids'] and previous['edge_ids'] == source['edge_ids']:
+            previous['end'] = end
+        else:
+            first_line = text[:text.find("\n")] if newlines else text
+            self.last_range = {
+                'start': {'line': line_number, 'column': len(first_line) - len(first_line.lstrip()) + 1},
+                'end': end,
+                'node_ids': source['node_ids'],
+                'edge_ids': source['edge_ids'],
+            }
+            self.source_map.append(self.last_range)
+
+    def getvalue(self) -> str:
+        return "\n".join(self.buffer)
+
+    def interface(self, module: ContractModule):
+        self.write("#[starknet::interface]")
+        self.write(f"trait I{module.name}<TContractState> {{")
+        for function in module.functions:
+            if function.external:
+                self.write(f"{function.signature('TContractState')};", function.source, indent=1)
+        self.write("}")
+
+    def storage(self, module: ContractModule, block: int = 0):
+        self.write("#[storage]", block=block)
+        self.write("struct Storage {", block=block)
+        for var in module.storage:
+            self.write(f"{var.name}: {var.type},", var.source, block=block, indent=1)
+        self.write("}", block=block)
+
+    def structs(self, module: ContractModule, block: int = 0):
+        for index, struct in enumerate(module.structs):
+            if index:
+                self.write("", block=block)
+            self.write(f"#[derive({', '.join(struct.derives)})]", struct.source, block=block)
+            self.write(f"pub struct {struct.name} {{", struct.source, block=block)
+            for struct_field in struct.fields:
+                self.write(f"{struct_field.name}: {struct_field.type},", struct_field.source, block=block, indent=1)
+            self.write("}", struct.source, block=block)
+
+    def function(self, function: Function, block: int = 0, indent: int = 0):
+        # One write for the whole function: its lines share a source range anyway
+        self.write(("\n" + "\t" * indent).join(function.lines()), function.source, block=block, indent=indent)
+
+    def event_enum(self, module: ContractModule, block: int = 0):
+        if not module.has_events:
+            return
+        self.write("#[event]", block=block)
+        self.write("#[derive(Drop, starknet::Event)]", block=block)
+        self.write("pub enum Event {", block=block)
+        for variant in module.events:
+            self.write(f"{variant.name}: {variant.name},", variant.source, block=block, indent=1)
+        self.write("}", block=block)
+
+    def implementation(self, module: ContractModule):
+        self.write("#[abi(embed_v0)]", indent=1)
+        self.write(f"impl {module.name} of super::I{module.name}<ContractState> {{", indent=1)
+        for function in module.functions:
+            if function.external:
+                # Code blocks keep their own indentation after the first line
+                self.function(function, indent=2)
+        self.write("}", indent=1)
+
+    def contract(self, module: ContractModule):
+        self.write("#[starknet::contract]")
+        self.write(f"mod {module.name} {{")
+        for path in module.imports:
+            self.write(f"use {path};", indent=1)
+        if module.storage_traits:
+            self.write(f"use core::starknet::storage::{{{', '.join(module.storage_traits)}}};", indent=1)
+        if module.imports or module.storage_traits:
+            self.write("")
+        self.storage(module, block=1)
+        self.write("")
+        if module.structs:
+            self.structs(module, block=1)
+            self.write("")
+        if module.constructor:
+            self.function(module.constructor, block=1)
+            self.write("")
+        if module.has_events:
+            self.event_enum(module, block=1)
+            self.write("")
+        self.implementation(module)
+        self.write("}")
+
+    def module(self, module: ContractModule):
+        # The interface sits outside the contract module and needs its own imports
+        for path in module.imports:
+            self.write(f"use {path};")
+        if module.imports:
+            self.write("")
+        self.interface(module)
+        for _ in range(3):
+            self.write("")
+        self.contract(module)
+
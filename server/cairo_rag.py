@@ -1,5 +1,7 @@
 from typing import Literal, cast, Any, Callable, List, Optional
 import os
+import hashlib
+import threading
 
 import requests
 import json
@@ -10,13 +12,13 @@ from langchain_community.vectorstores import Chroma
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import tool
-from langchain_community.document_loaders import PyMuPDFLoader
 from langgraph.prebuilt import ToolNode
 from langgraph.checkpoint.memory import MemorySaver
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.tools.yahoo_finance_news import YahooFinanceNewsTool
 from langchain_core.runnables import RunnableConfig
@@ -24,133 +26,52 @@ from langchain_core.tools import InjectedToolArg
 from typing_extensions import Annotated
 from langsmith import traceable
 
-load_dotenv()
+from semantic_cache import SemanticAnswerCache
 
-def document_ingestion(file_path):
-    documents = []
-    pdf_reader = PyMuPDFLoader(file_path=file_path).load()
-    documents.extend(pdf_reader)
-    print("document ingested")
-    return documents
+load_dotenv()
 
-def text_splitting(documents):
-    text_splitter = RecursiveCharacterTextSplitter(
+def make_text_splitter():
+    return RecursiveCharacterTextSplitter(
         chunk_size=1500,
         chunk_overlap=500,
     )
-    chunks = text_splitter.split_documents(documents=documents)
-    print("document split into chunks")
-    return chunks
 
-def store_into_vectorstore(file_path, db_path, force_regenerate=False, chunks=None):
+def load_embedding_function():
     # Using MiniLM for consistency with existing vectorstore
-    embedding_function = HuggingFaceEmbeddings(
+    return HuggingFaceEmbeddings(
         model_name="all-MiniLM-L6-v2",
         model_kwargs={'device': 'cpu'}
     )
 
-    try:
-        # If vectorstore exists and no force regenerate, load existing
-        if os.path.exists(db_path) and not force_regenerate and chunks is None:
-            vectordb = Chroma(persist_directory=db_path, embedding_function=embedding_function)
-            print("vectorstore loaded from local")
-        else:
-            # If no vectorstore or force regenerate or new chunks provided, create new one
-            if chunks is None:
-                print("Creating new vectorstore from PDF...")
-                documents = document_ingestion(file_path)
-                chunks = text_splitting(documents)
-            
-            # Remove existing vectorstore if it exists
-            if os.path.exists(db_path):
-                import shutil
-                shutil.rmtree(db_path)
-                print("Removed existing vectorstore")
-            
-            vectordb = Chroma.from_documents(
-                documents=chunks,
-                embedding=embedding_function,
-                persist_directory=db_path,
-                collection_metadata={"hnsw:space": "cosine"}
-            )
-            print("vectorstore created and saved to local")
-            vectordb.persist()
-    
-    except Exception as e:
-        print(f"Error with vectorstore: {e}")
-        # If there's any error, try recreating the vectorstore
-        if os.path.exists(db_path):
-            import shutil
-            shutil.rmtree(db_path)
-            print("Removed existing vectorstore due to error")
-        
-        documents = document_ingestion(file_path)
-        chunks = text_splitting(documents)
-        vectordb = Chroma.from_documents(
-            documents=chunks,
-            embedding=embedding_function,
-            persist_directory=db_path,
-            collection_metadata={"hnsw:space": "cosine"}
-        )
-        print("vectorstore recreated after error")
-        vectordb.persist()
+def load_vectorstore(db_path, embedding_function=None):
+    if embedding_function is None:
+        embedding_function = load_embedding_function()
+
+    # Ingestion runs offline (see ingest.py); requests only ever open the store
+    if not os.path.exists(db_path):
+        raise Exception(f"Cairo docs vectorstore not found at {db_path}, run `python ingest.py` to build it")
 
+    vectordb = Chroma(
+        persist_directory=db_path,
+        embedding_function=embedding_function,
+        collection_metadata={"hnsw:space": "cosine"}
+    )
+    print("vectorstore loaded from local")
     return vectordb
 
-def query_cairo_docs(query: str, force_regenerate: bool = False) -> dict:
-    """Query the Cairo documentation using RAG.
-    
-    Args:
-        query: The question to ask about Cairo
-        force_regenerate: If True, forces regeneration of the vectorstore even if it exists
-        
-    Returns:
-        dict containing the context documents and final answer
-    """
-    # Setup paths
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(script_dir, "documents", "cairo_programming_language.pdf")
-    db_path = os.path.join(script_dir, "vectorstore", "db_chroma")
-    
-    print(f"Looking for PDF at: {file_path}")
-    
-    if not os.path.exists(file_path):
-        raise Exception(f"Cairo documentation PDF not found at {file_path}")
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+PDF_PATH = os.path.join(SCRIPT_DIR, "documents", "cairo_programming_language.pdf")
+DB_PATH = os.path.join(SCRIPT_DIR, "vectorstore", "db_chroma")
+ANSWER_CACHE_PATH = os.path.join(SCRIPT_DIR, "vectorstore", "answer_cache.sqlite3")
 
-    # Initialize vectorstore
-    vectorstore = store_into_vectorstore(file_path, db_path, force_regenerate=force_regenerate)
-    
-    # More sophisticated retrieval strategy
-    retriever = vectorstore.as_retriever(
-        search_type="mmr",  # Using Maximum Marginal Relevance
-        search_kwargs={
-            'k': 5,  # Get more documents initially
-            'fetch_k': 20,  # Fetch more candidates
-            'lambda_mult': 0.7,  # Diversity factor
-        }
-    )
+RETRIEVAL_KWARGS = {
+    'k': 5,  # Get more documents initially
+    'fetch_k': 20,  # Fetch more candidates
+    'lambda_mult': 0.7,  # Diversity factor
+}
 
-    # Get relevant documents
-    context_docs = retriever.get_relevant_documents(query)
-    
-    # Filter and rerank the documents based on relevance
-    filtered_docs = []
-    seen_content = set()
-    for doc in context_docs:
-        # Skip if content is too similar to what we've already included
-        if doc.page_content.strip() in seen_content:
-            continue
-        # Skip if content seems irrelevant (you can adjust these conditions)
-        if len(doc.page_content.strip()) < 50:  # Skip very short snippets
-            continue
-        filtered_docs.append(doc)
-        seen_content.add(doc.page_content.strip())
-        if len(filtered_docs) >= 3:  # Keep top 3 most relevant unique chunks
-            break
-    
-    # Setup prompt
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are an AI assistant helping with Cairo programming questions.
+QA_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are an AI assistant helping with Cairo programming questions.
         You MUST use the provided context from the RAG system to answer questions.
         
         Rules:
@@ -161,45 +82,226 @@ def query_cairo_docs(query: str, force_regenerate: bool = False) -> dict:
         
         Context: {context}
         Question: {question}"""),
-        ("human", "{question}")
-    ])
+    ("human", "{question}")
+])
 
-    # Setup LLM
-    llm = ChatOpenAI(
-        model="gpt-4",
-        temperature=0,
-        timeout=None,
-        max_retries=2
-    )
+class CairoRAGService:
+    """Holds the embedding model, vectorstore, retriever and LLM client for the
+    lifetime of the process so each question only pays for retrieval and
+    generation."""
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self.embedding_function = None
+        self.vectorstore = None
+        self.retriever = None
+        self.llm = None
+        self.lock = threading.Lock()
+        self.answer_cache = SemanticAnswerCache(
+            ANSWER_CACHE_PATH,
+            threshold=float(os.getenv('RAG_CACHE_THRESHOLD', 0.95)),
+            ttl=float(os.getenv('RAG_CACHE_TTL', 86400)),
+            max_entries=int(os.getenv('RAG_CACHE_MAX_ENTRIES', 1000))
+        )
+
+    def vectorstore_fingerprint(self) -> str:
+        # Changes whenever the persisted collection is rewritten
+        entries = []
+        for root, _, files in os.walk(self.db_path):
+            for name in files:
+                stat = os.stat(os.path.join(root, name))
+                entries.append(f"{os.path.relpath(os.path.join(root, name), self.db_path)}:{stat.st_size}:{stat.st_mtime_ns}")
+        return hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()
+
+    def load(self, reload: bool = False):
+        if self.retriever is not None and not reload:
+            return
+
+        with self.lock:
+            if self.retriever is not None and not reload:
+                return
+
+            if self.embedding_function is None:
+                self.embedding_function = load_embedding_function()
+
+            # Fingerprint before Chroma opens the files so restarts see the same value
+            fingerprint = self.vectorstore_fingerprint()
 
+            self.vectorstore = load_vectorstore(self.db_path, embedding_function=self.embedding_function)
+            self.answer_cache.set_fingerprint(fingerprint)
+
+            # More sophisticated retrieval strategy
+            self.retriever = self.vectorstore.as_retriever(
+                search_type="mmr",  # Using Maximum Marginal Relevance
+                search_kwargs=RETRIEVAL_KWARGS
+            )
+
+    def get_llm(self):
+        # Created on first generation so retrieval-only callers don't need an OpenAI key
+        with self.lock:
+            if self.llm is None:
+                self.llm = ChatOpenAI(
+                    model="gpt-4",
+                    temperature=0,
+                    timeout=None,
+                    max_retries=2
+                )
+            return self.llm
+
+    def warm_up(self):
+        """Load everything and run one embedding so the first request isn't the slow one."""
+        self.load()
+        self.embedding_function.embed_query("warm up")
+        self.get_llm()
+        print("Cairo RAG service warmed up")
+
+    def retrieve(self, query: str, embedding: list = None) -> list:
+        self.load()
+
+        # Get relevant documents, reusing the query embedding when we have it
+        if embedding is not None:
+            context_docs = self.vectorstore.max_marginal_relevance_search_by_vector(embedding, **RETRIEVAL_KWARGS)
+        else:
+            context_docs = self.retriever.get_relevant_documents(query)
+        
+        # Filter and rerank the documents based on relevance
+        filtered_docs = []
+        seen_content = set()
+        for doc in context_docs:
+            # Skip if content is too similar to what we've already included
+            if doc.page_content.strip() in seen_content:
+                continue
+            # Skip if content seems irrelevant (you can adjust these conditions)
+            if len(doc.page_content.strip()) < 50:  # Skip very short snippets
+                continue
+            filtered_docs.append(doc)
+            seen_content.add(doc.page_content.strip())
+            if len(filtered_docs) >= 3:  # Keep top 3 most relevant unique chunks
+                break
+        return filtered_docs
+
+    def lookup(self, query: str, force_regenerate: bool = False):
+        """Embed the question and check the answer cache. Returns (embedding, cached entry or None)."""
+        self.load(reload=force_regenerate)
+
+        embedding = self.embedding_function.embed_query(query)
+        cached = self.answer_cache.get(embedding)
+        if cached:
+            print(f"Answer cache hit (similarity {cached['similarity']:.3f}) for: {cached['query']}")
+        return embedding, cached
+
+    def build_messages(self, query: str, docs: list) -> list:
+        return QA_PROMPT.invoke({
+            "context": format_context(docs),
+            "question": query
+        }).to_messages()
+
+    def remember(self, query: str, embedding: list, answer: str, docs: list):
+        self.answer_cache.put(
+            query,
+            embedding,
+            answer,
+            [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in docs]
+        )
+
+    def query(self, query: str, force_regenerate: bool = False) -> dict:
+        embedding, cached = self.lookup(query, force_regenerate=force_regenerate)
+        if cached:
+            return {
+                "context": [Document(**doc) for doc in cached["context"]],
+                "answer": cached["answer"],
+                "cached": True
+            }
+
+        filtered_docs = self.retrieve(query, embedding)
+        
+        # Get response
+        answer = self.get_llm().invoke(self.build_messages(query, filtered_docs)).content
+
+        self.remember(query, embedding, answer, filtered_docs)
+
+        return {
+            "context": filtered_docs,
+            "answer": answer,
+            "cached": False
+        }
+
+    def stream_query(self, query: str, force_regenerate: bool = False):
+        """Yield the retrieved context, then answer tokens as the LLM produces them."""
+        embedding, cached = self.lookup(query, force_regenerate=force_regenerate)
+        if cached:
+            yield {"type": "context", "context": [doc["page_content"] for doc in cached["context"]]}
+            yield {"type": "token", "content": cached["answer"]}
+            yield {"type": "done", "answer": cached["answer"], "cached": True}
+            return
+
+        filtered_docs = self.retrieve(query, embedding)
+        yield {"type": "context", "context": [doc.page_content for doc in filtered_docs]}
+
+        tokens = []
+        for chunk in self.get_llm().stream(self.build_messages(query, filtered_docs)):
+            if chunk.content:
+                tokens.append(chunk.content)
+                yield {"type": "token", "content": chunk.content}
+        answer = "".join(tokens)
+
+        self.remember(query, embedding, answer, filtered_docs)
+        yield {"type": "done", "answer": answer, "cached": False}
+
+def format_context(docs: list) -> str:
     # Format context with better structure
-    context = "\n\n---\n\n".join([
+    return "\n\n---\n\n".join([
         f"Excerpt {i+1}:\n{doc.page_content}"
-        for i, doc in enumerate(filtered_docs)
+        for i, doc in enumerate(docs)
     ])
+
+_rag_service = None
+_rag_service_lock = threading.Lock()
+
+def get_rag_service() -> CairoRAGService:
+    global _rag_service
+    with _rag_service_lock:
+        if _rag_service is None:
+            _rag_service = CairoRAGService()
+        return _rag_service
+
+def start_warm_up():
+    """Warm up the shared RAG service in the background at app startup."""
+    def warm_up():
+        try:
+            get_rag_service().warm_up()
+        except Exception as e:
+            print(f"Cairo RAG warm-up failed: {e}")
+
+    thread = threading.Thread(target=warm_up, daemon=True)
+    thread.start()
+    return thread
+
+def query_cairo_docs(query: str, force_regenerate: bool = False) -> dict:
+    """Query the Cairo documentation using RAG.
     
-    # Get response
-    response = prompt.invoke({
-        "context": context,
-        "question": query
-    }).to_messages()
-    
-    answer = llm.invoke(response).content
+    Args:
+        query: The question to ask about Cairo
+        force_regenerate: If True, reopens the vectorstore to pick up the latest offline ingestion
+        
+    Returns:
+        dict containing the context documents and final answer
+    """
+    return get_rag_service().query(query, force_regenerate=force_regenerate)
 
-    return {
-        "context": filtered_docs,
-        "answer": answer
-    }
+def stream_cairo_docs(query: str, force_regenerate: bool = False):
+    """Streaming variant of query_cairo_docs, yielding context, token and done events."""
+    return get_rag_service().stream_query(query, force_regenerate=force_regenerate)
 
 if __name__ == "__main__":
     print("Testing Cairo RAG system...")
     
-    # Test with force_regenerate=True to rebuild the vectorstore
+    # Test with force_regenerate=True to reopen the vectorstore after running ingest.py
     query = "How do I create and use a storage variable in Cairo?"
-    force_regenerate = False  # Set to True to force vectorstore regeneration
+    force_regenerate = False  # Set to True to reload the vectorstore from disk
     
     print(f"\nQuery: {query}")
-    print(f"\nForce regenerate vectorstore: {force_regenerate}")
+    print(f"\nReload vectorstore: {force_regenerate}")
     print("\nSearching Cairo documentation...")
     
     try:
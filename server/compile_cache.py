@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# React Flow fields that only describe layout/UI state and never reach codegen
+LAYOUT_NODE_FIELDS = {
+    'position', 'positionAbsolute', 'measured', 'width', 'height', 'selected',
+    'dragging', 'resizing', 'zIndex', 'style', 'className', 'dragHandle',
+}
+LAYOUT_EDGE_FIELDS = {
+    'selected', 'animated', 'style', 'className', 'zIndex', 'markerStart',
+    'markerEnd', 'interactionWidth',
+}
+
+# Inputs to codegen other than the graph; a change to any of them invalidates the cache
+CODEGEN_FILES = ['contract_builder.py', 'cairo_ir.py', 'language_map.py', 'language.json']
+
+
+def canonicalize_graph(graph: dict, contract_name: str) -> dict:
+    """The parts of a compile request that affect the generated Cairo, in a stable form."""
+    return {
+        'contractName': contract_name,
+        'nodeData': [
+            {key: value for key, value in node.items() if key not in LAYOUT_NODE_FIELDS}
+            for node in graph.get('nodeData', [])
+        ],
+        'edgeData': [
+            {key: value for key, value in edge.items() if key not in LAYOUT_EDGE_FIELDS}
+            for edge in graph.get('edgeData', [])
+        ],
+    }
+
+
+class CompileCache:
+    """Generated Cairo and its source map keyed by the hash of the canonical block graph.
+
+    Hits are served from an in-memory LRU first and then from one file per
+    entry under `directory`, which keeps at most `max_disk_entries` files.
+    """
+
+    def __init__(self, directory: str, max_entries: int = 512, max_disk_entries: int = 10000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.puts = 0
+        self.file_hashes = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def codegen_fingerprint(self) -> str:
+        parts = []
+        for name in CODEGEN_FILES:
+            path = os.path.join(SERVER_DIR, name)
+            stat = os.stat(path)
+            cached = self.file_hashes.get(path)
+            if cached is None or cached[0] != stat.st_mtime_ns:
+                with open(path, 'rb') as file:
+                    cached = (stat.st_mtime_ns, hashlib.sha256(file.read()).hexdigest())
+                self.file_hashes[path] = cached
+            parts.append(cached[1])
+        return ":".join(parts)
+
+    def key(self, graph: dict, contract_name: str) -> str:
+        canonical = json.dumps(canonicalize_graph(graph, contract_name), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(f"{self.codegen_fingerprint()}\0{canonical}".encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        try:
+            with open(self.path(key), 'r') as file:
+                entry = json.load(file)
+            os.utime(self.path(key))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        self.remember(key, entry)
+        return entry
+
+    def remember(self, key: str, entry: dict):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def put(self, key: str, entry: dict):
+        """Store `entry`, a dict with the generated code and its sourceMap."""
+        self.remember(key, entry)
+
+        tmp_path = f"{self.path(key)}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(entry, file)
+        os.replace(tmp_path, self.path(key))
+
+        with self.lock:
+            self.puts += 1
+            prune = self.puts % 100 == 0
+        if prune:
+            self.prune_disk()
+
+    def prune_disk(self):
+        paths = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith('.json')
+        ]
+        if len(paths) <= self.max_disk_entries:
+            return
+        paths.sort(key=lambda path: os.stat(path).st_mtime)
+        for path in paths[:len(paths) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+_compile_cache = None
+_compile_cache_lock = threading.Lock()
+
+
+def get_compile_cache() -> CompileCache:
+    global _compile_cache
+    with _compile_cache_lock:
+        if _compile_cache is None:
+            _compile_cache = CompileCache(
+                os.getenv('COMPILE_CACHE_DIR', os.path.join(SERVER_DIR, '.compile_cache')),
+                max_entries=int(os.getenv('COMPILE_CACHE_MAX_ENTRIES', 512))
+            )
+        return _compile_cache
@@ -0,0 +1,43 @@
+import os
+import threading
+from collections import OrderedDict
+
+
+class CompileSessions:
+    """The last ContractBuilder of each editor session, for incremental /compile.
+
+    A session's next compile passes its previous builder to ContractBuilder,
+    which then only regenerates the parts of the contract whose blocks
+    changed. Only the `max_sessions` most recently used sessions are kept.
+    """
+
+    def __init__(self, max_sessions: int = 256):
+        self.max_sessions = max_sessions
+        self.builders = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, session_id: str):
+        with self.lock:
+            builder = self.builders.get(session_id)
+            if builder is not None:
+                self.builders.move_to_end(session_id)
+            return builder
+
+    def put(self, session_id: str, builder):
+        with self.lock:
+            self.builders[session_id] = builder
+            self.builders.move_to_end(session_id)
+            while len(self.builders) > self.max_sessions:
+                self.builders.popitem(last=False)
+
+
+_compile_sessions = None
+_compile_sessions_lock = threading.Lock()
+
+
+def get_compile_sessions() -> CompileSessions:
+    global _compile_sessions
+    with _compile_sessions_lock:
+        if _compile_sessions is None:
+            _compile_sessions = CompileSessions(int(os.getenv('COMPILE_MAX_SESSIONS', 256)))
+        return _compile_sessions
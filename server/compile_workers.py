@@ -0,0 +1,107 @@
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future
+
+from workspace import get_workspace_pool
+
+
+class CompileWorker(threading.Thread):
+    """Builds sources one at a time in its own long-lived Scarb project.
+
+    The project's dependencies are fetched once when the worker starts, so
+    every build runs `scarb --offline build` without resolving the registry
+    or git sources again, and target/ (Scarb's incremental cache) is kept
+    between builds.
+    """
+
+    def __init__(self, jobs: queue.Queue, workspace):
+        super().__init__(daemon=True)
+        self.jobs = jobs
+        self.workspace = workspace
+        self.offline = False
+
+    def prepare(self):
+        try:
+            result = subprocess.run(['scarb', 'fetch'], capture_output=True, text=True, cwd=self.workspace.path)
+        except FileNotFoundError as e:
+            print(f"Compile worker could not run scarb: {e}")
+            return
+        self.offline = result.returncode == 0
+        if not self.offline:
+            print(f"scarb fetch failed, compile worker will resolve dependencies on every build: {result.stderr}")
+
+    def build(self, code: str) -> dict:
+        self.workspace.write_source(code)
+        target_dir = self.workspace.target_dir
+        if os.path.isdir(target_dir):
+            # Drop the previous contract's artifacts but keep the incremental cache
+            for name in os.listdir(target_dir):
+                path = os.path.join(target_dir, name)
+                if os.path.isfile(path):
+                    os.remove(path)
+
+        command = ['scarb', '--offline', 'build'] if self.offline else ['scarb', 'build']
+        # A missing scarb raises rather than caching a failed build
+        result = subprocess.run(command, capture_output=True, text=True, cwd=self.workspace.path)
+        return {'success': result.returncode == 0, 'output': result.stdout + result.stderr}
+
+    def run(self):
+        self.prepare()
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            code, collect, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = self.build(code)
+                if collect is not None:
+                    collect(result, self.workspace.target_dir)
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+
+
+class CompilePool:
+    """A fixed set of warm compile workers fed from one queue."""
+
+    def __init__(self, size: int, workspace_pool=None):
+        workspace_pool = workspace_pool or get_workspace_pool()
+        self.jobs = queue.Queue()
+        self.workers = [CompileWorker(self.jobs, workspace_pool.create()) for _ in range(size)]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, code: str, collect=None) -> Future:
+        """Queue a build; `collect(result, target_dir)` runs on the worker while it still owns the artifacts."""
+        future = Future()
+        self.jobs.put((code, collect, future))
+        return future
+
+    def build(self, code: str, collect=None, timeout: float = None) -> dict:
+        return self.submit(code, collect).result(timeout)
+
+    def close(self):
+        for _ in self.workers:
+            self.jobs.put(None)
+        for worker in self.workers:
+            worker.join()
+            shutil.rmtree(worker.workspace.path, ignore_errors=True)
+
+
+_compile_pool = None
+_compile_pool_lock = threading.Lock()
+
+
+def get_compile_pool() -> CompilePool:
+    global _compile_pool
+    with _compile_pool_lock:
+        if _compile_pool is None:
+            _compile_pool = CompilePool(int(os.getenv('COMPILE_WORKERS', min(4, os.cpu_count() or 1))))
+            atexit.register(_compile_pool.close)
+        return _compile_pool
@@ -1,16 +1,136 @@
 import json
+import re
 from typing import List, Dict, Any
 import time
 import os
 
+from cairo_ir import CairoEmitter, ContractModule, EventVariant, Function, Param, StorageVar, Struct, StructField
+from language_map import get_language_map, render_template
+
+# Function identifiers generated from language.json templates
+TEMPLATE_FUNCTIONS = ('GET', 'SET', 'INCREMENT', 'DECREMENT')
+
+IDENTIFIER_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+NUMERIC_LITERAL_RE = re.compile(r'(0x[0-9a-fA-F]+|[0-9]+)(_[A-Za-z0-9]+)?')
+
+# What the generated `#[derive(Drop, starknet::Event)]` structs implement
+STRUCT_TRAITS = ('Drop', 'starknet::Event')
+# Traits every event field and constructor argument needs
+ARGUMENT_TRAITS = ('Drop', 'Serde')
+
+
+class GraphValidationError(ValueError):
+    """A block graph that can't be turned into a valid contract; `errors` lists every problem found."""
+
+    def __init__(self, errors: List[Dict]):
+        self.errors = errors
+        summary = "; ".join(error['message'] for error in errors[:3])
+        if len(errors) > 3:
+            summary += f" (and {len(errors) - 3} more)"
+        super().__init__(f"Invalid block graph: {summary}")
+
+
 class ContractBuilder:
-    def __init__(self, jsonData: Dict[str, Any]):
+    def __init__(self, jsonData: Dict[str, Any], previous: 'ContractBuilder' = None, changedNodeIds=None):
+        """Pass the builder of the previous version of the graph as `previous`
+        to regenerate only the storage entries, functions and structs whose
+        nodes changed. `changedNodeIds` are the ids of nodes whose data or
+        edges changed (both ends of an added or removed edge); when omitted
+        they are found by comparing the two graphs.
+        """
         self.contractName = ""
         self.functions = []
         self.storageVars = []
+        self.sourceMap = []
+        self.issues = []
         self.interfaces = []
         self.structs = []
         self.jsonData = jsonData
+        self.buildGraphIndex()
+
+        # Generated units by (kind, root node id), with the node ids each one read
+        self.units = {}
+        self.reads = None
+        self.previousUnits = previous.units if previous else {}
+        self.previousLanguageMap = previous.languageMap if previous else None
+        self.languageMap = None
+        if previous:
+            self.changedNodeIds = set(changedNodeIds) if changedNodeIds is not None else self.diffNodeIds(previous)
+        else:
+            self.changedNodeIds = set()
+
+    def buildGraphIndex(self):
+        # Index the graph once so lookups don't rescan nodeData/edgeData
+        self.nodesById = {}
+        self.nodePositions = {}
+        self.nodesByDataType = {}
+        self.nodesByNodeType = {}
+        self.adjacency = {}
+
+        for position, node in enumerate(self.jsonData.get('nodeData', [])):
+            nodeId = node.get('id')
+            if nodeId not in self.nodesById:
+                self.nodesById[nodeId] = node
+            self.nodePositions[id(node)] = position
+            self.nodesByDataType.setdefault(node.get('data', {}).get('type'), []).append(node)
+            self.nodesByNodeType.setdefault(node.get('type'), []).append(node)
+
+        for edge in self.jsonData.get('edgeData', []):
+            source, target = edge['source'], edge['target']
+            self.adjacency.setdefault(source, []).append((edge, target))
+            if target != source:
+                self.adjacency.setdefault(target, []).append((edge, source))
+
+    def diffNodeIds(self, previous: 'ContractBuilder') -> set:
+        # Nodes added, removed, or whose type, data or edges differ from the previous graph
+        changed = {nodeId for nodeId in previous.nodesById if nodeId not in self.nodesById}
+        for nodeId, node in self.nodesById.items():
+            previousNode = previous.nodesById.get(nodeId)
+            if previousNode is None or node.get('type') != previousNode.get('type') or \
+                    node.get('data') != previousNode.get('data') or \
+                    self.adjacency.get(nodeId) != previous.adjacency.get(nodeId):
+                changed.add(nodeId)
+        return changed
+
+    def recordRead(self, nodeId: str):
+        # Inside a unit, remember the node and the neighbours a lookup looked at
+        if self.reads is not None:
+            self.reads.add(nodeId)
+            self.reads.update(connectedNodeId for _, connectedNodeId in self.adjacency.get(nodeId, []))
+
+    def unit(self, kind: str, node: Dict, generate):
+        """Run `generate` for `node`, or reuse its result from the previous build if nothing it read changed."""
+        key = (kind, node['id'])
+        if key in self.units or self.nodesById.get(node['id']) is not node:
+            # Duplicate node ids can't be told apart between builds
+            return generate()
+        previous = self.previousUnits.get(key)
+        if previous is not None and not previous[0] & self.changedNodeIds:
+            self.units[key] = previous
+            return previous[1]
+
+        self.reads = {node['id']}
+        try:
+            result = generate()
+        finally:
+            reads, self.reads = self.reads, None
+        self.units[key] = (reads, result)
+        return result
+
+    def edgeIdsBetween(self, nodeIds: List[str]) -> List[str]:
+        # Ids of the edges joining any two of the given nodes
+        nodeIdSet = set(nodeIds)
+        edgeIds = {}
+        for nodeId in nodeIds:
+            self.recordRead(nodeId)
+            for edge, connectedNodeId in self.adjacency.get(nodeId, []):
+                if connectedNodeId in nodeIdSet:
+                    edgeIds[edge.get('id')] = True
+        return list(edgeIds)
+
+    def sourceOf(self, nodes: List[Dict]) -> Dict[str, List[str]]:
+        nodeIds = list(dict.fromkeys(node['id'] for node in nodes if node))
+        return {'node_ids': nodeIds, 'edge_ids': self.edgeIdsBetween(nodeIds)}
 
     def loadJson(self, jsonFilePath: str) -> Dict:
         try:
@@ -24,341 +144,173 @@ class ContractBuilder:
     def setName(self, name: str):
         self.contractName = name
 
-    def addFunction(self, functionData: dict):
-        self.functions.append(functionData)
+    def addFunction(self, function: Function):
+        self.functions.append(function)
     
-    def buildInterfaceBlock(self) -> str:
+    def contractModule(self) -> ContractModule:
+        """The typed IR of the whole contract, from the generated storage variables and functions."""
         if not self.contractName:
-            raise ValueError("Contract name must be set before building interface block")
-        
-        interfaceName = f"I{self.contractName}"
-        
-        interfaceBlock = [
-            "#[starknet::interface]",
-            f"trait {interfaceName}<TContractState> {{",
-        ]
-        
+            raise ValueError("Contract name must be set before building the contract")
 
-        # This is suspicious TODO 
-        for func in self.functions:
-            template = func['template']
-            if not template:
-                continue
-                
-            # Get all lines that aren't just a brace or empty
-            code_lines = [line.strip() for line in template if line.strip() and line.strip() not in ['{', '}']]
-            if not code_lines:
-                continue
-                
-            # Get the function signature line
-            signature_line = code_lines[0]
-            
-            # Extract function name and parameters
-            fn_start = signature_line.find('fn ')
-            params_start = signature_line.find('(', fn_start)
-            params_end = signature_line.find(')', params_start)
-            
-            if fn_start < 0 or params_start < 0 or params_end < 0:
-                continue
-                
-            # Get the function name
-            fn_name = signature_line[fn_start:params_start].strip()
-            
-            # Get and process parameters
-            params = signature_line[params_start+1:params_end].strip()
-            param_list = [p.strip() for p in params.split(',') if p.strip()]
-            
-            # Replace ContractState with TContractState in self parameter
-            if param_list and 'self' in param_list[0]:
-                param_list[0] = param_list[0].replace('ContractState', 'TContractState')
-            
-            # Reconstruct the function signature
-            params = ', '.join(param_list)
-            
-            # Check if there's a return type
-            return_type = ""
-            if " -> " in signature_line:
-                return_type = " -> " + signature_line.split(" -> ")[1].strip().rstrip('{').strip()
-            
-            signature = f"\t{fn_name}({params}){return_type};"
-            interfaceBlock.append(signature)
-
-            ## Until here
-        
-        interfaceBlock.append("}")
-        
-        return "\n".join(interfaceBlock)
-
-    def buildContractBlock(self) -> str:
-        if not self.contractName:
-            raise ValueError("Contract name must be set before building contract block")
-        
-        contractParts = [
-            "#[starknet::contract]",
-            f"mod {self.contractName} {{",
-        ]
+        functionDataNodes = self.nodesByDataType.get('FUNCTION', [])
 
         hasRead = any(
             node.get('data', {}).get('identifier') == 'GET'
-            for node in self.jsonData.get('nodeData', [])
-            if node.get('data', {}).get('type') == 'FUNCTION'
+            for node in functionDataNodes
         )
         
         hasWrite = any(
             node.get('data', {}).get('identifier') in ['SET', 'INCREMENT', 'DECREMENT']
-            for node in self.jsonData.get('nodeData', [])
-            if node.get('data', {}).get('type') == 'FUNCTION'
+            for node in functionDataNodes
         )
 
-        if hasRead or hasWrite:
-            storageTraits = []
-            if hasRead:
-                storageTraits.append("StoragePointerReadAccess")
-            if hasWrite:
-                storageTraits.append("StoragePointerWriteAccess")
-            contractParts.append(f"\tuse core::starknet::storage::{{{', '.join(storageTraits)}}};")
-            contractParts.append("")
-
-        storageBlock = self.buildStorageBlock()
-        indentedStorage = "\t" + storageBlock.replace("\n", "\n\t")
-        contractParts.append(indentedStorage)
-        contractParts.append("")
-        
-        # Add struct definitions if any exist
-        structs = self.buildStructs()
-        if structs:
-            indentedStructs = "\t" + structs.replace("\n", "\n\t")
-            contractParts.append(indentedStructs)
-            contractParts.append("")
-
-        # Find and add constructor if it exists
+        storageTraits = []
+        if hasRead:
+            storageTraits.append("StoragePointerReadAccess")
+        if hasWrite:
+            storageTraits.append("StoragePointerWriteAccess")
+
+        # Find the constructor if it exists
+        constructor = None
         constructorNodes = [
-            node for node in self.jsonData.get('nodeData', [])
-            if node.get('data', {}).get('type') == 'FUNCTION' and 
-            node.get('data', {}).get('identifier') == 'CONSTRUCTOR'
+            node for node in functionDataNodes
+            if node.get('data', {}).get('identifier') == 'CONSTRUCTOR'
         ]
         if constructorNodes:
-            constructor = self.generateConstructor(constructorNodes[0])
-            indentedConstructor = "\t" + constructor.replace("\n", "\n\t")
-            contractParts.append(indentedConstructor)
-            contractParts.append("")
-
-        # Add event enum if any events exist
-        events = self.buildEventEnum()
-        if events:
-            indentedEvents = "\t" + events.replace("\n", "\n\t")
-            contractParts.append(indentedEvents)
-            contractParts.append("")
-        
-        implBlock = self.buildImplementationBlock()
-        contractParts.append(implBlock)
-        
-        contractParts.append("}")
-        
-        return "\n".join(contractParts)
-    
-    def buildStorageBlock(self):
-        storageBlock = [
-            "#[storage]",
-            "struct Storage {",
-        ]
-        
-        if self.storageVars:
-            storageBlock.extend(f"\t{var}" for var in self.storageVars)
-            
-        storageBlock.append("}")
-        
-        return "\n".join(storageBlock)
+            constructorNode = constructorNodes[0]
+            constructor = self.unit('constructor', constructorNode, lambda: self.functionsAddedBy(
+                lambda: self.generateConstructor(constructorNode)
+            ))[0]
 
-    def buildImplementationBlock(self) -> str:
-        if not self.contractName:
-            raise ValueError("Contract name must be set before building implementation block")
-            
-        implParts = [
-            "\t#[abi(embed_v0)]",
-            f"\timpl {self.contractName} of super::I{self.contractName}<ContractState> {{",
-        ]
-        if self.functions:
-            for func in self.functions:
-                if not func.get('is_constructor', False):  # Skip constructor in implementation block
-                    implParts.extend(["\t\t" + line for line in func['template']])
-        
-        implParts.append("\t}")
-        
-        return "\n".join(implParts)
+        eventNodes = self.getNodesByType('EVENT')
+        events = []
+        for node in eventNodes:
+            events.extend(self.unit('event_variant', node, lambda: self.eventVariants(node)))
+
+        module = ContractModule(
+            name=self.contractName,
+            storage_traits=storageTraits,
+            storage=self.storageVars,
+            structs=self.generateStructs(),
+            constructor=constructor,
+            events=events,
+            functions=self.functions,
+            has_events=bool(eventNodes),
+        )
+        module.imports = self.importsFor(module.types())
+        return module
+
+    def importsFor(self, types: List[str]) -> List[str]:
+        # `use` paths for the types outside the prelude (language.json "imports"), in first-use order
+        importTable = (self.languageMap or get_language_map()).get('imports', {})
+        imports = {}
+        for typeName in types:
+            for name in IDENTIFIER_RE.findall(typeName):
+                if name in importTable:
+                    imports[importTable[name]] = True
+        return list(imports)
 
     def getStructFields(self, structNode: Dict) -> List[Dict]:
-        edges = self.getNodeEdges(structNode['id'])
         fields = []
         
-        for connectedNodeId in edges['connectedNodes']:
-            # First find the TypedVariable node
-            typedVarNode = next(
-                (node for node in self.jsonData['nodeData'] if node['id'] == connectedNodeId), 
-                None
-            )
-            
-            if not typedVarNode or typedVarNode['data']['type'] != 'TYPED_VAR':
-                continue
-            
-            # Get the edges of the TypedVariable node to find its connected primitive type
-            typedVarEdges = self.getNodeEdges(typedVarNode['id'])
-            
-            for primitiveNodeId in typedVarEdges['connectedNodes']:
-                primitiveNode = next(
-                    (node for node in self.jsonData['nodeData'] if node['id'] == primitiveNodeId), 
-                    None
-                )
-                
-                if primitiveNode and primitiveNode['data']['type'] == 'PRIM_TYPE':
-                    fields.append({
-                        'name': typedVarNode['data'].get('label', f'field_{len(fields)}'),
-                        'type': self.getPrimitiveType(primitiveNode),
-                        'is_key': typedVarNode['data'].get('is_key', False) # NOT SUPPORTED YET NEED TO UPDATE FE
-                    })
-                    break  # Found the primitive type for this typed variable
+        for typedVarNode in self.getConnectedNodes(structNode['id'], 'TYPED_VAR'):
+            # Find the primitive type connected to this typed variable
+            primitiveNode = self.getFirstConnectedNode(typedVarNode['id'], 'PRIM_TYPE')
+            
+            if primitiveNode:
+                fields.append({
+                    'name': typedVarNode['data'].get('label', f'field_{len(fields)}'),
+                    'type': self.getPrimitiveType(primitiveNode),
+                    'is_key': typedVarNode['data'].get('is_key', False), # NOT SUPPORTED YET NEED TO UPDATE FE
+                    'nodes': [typedVarNode, primitiveNode]
+                })
                 
         return fields
     
-    def buildEventEnum(self) -> str:
-        eventNodes = self.getNodesByType('EVENT')
-        if not eventNodes:
-            return ""
-            
-        enumBlock = [
-            "#[event]",
-            "#[derive(Drop, starknet::Event)]",
-            "pub enum Event {",
-        ]
-        
-        for node in eventNodes:
-            structName = self.getConnectedStructName(node['id'])
-            if structName:
-                # Use the struct name as the event name
-                enumBlock.append(f"\t{structName}: {structName},")
-        
-        enumBlock.append("}")
-        return "\n".join(enumBlock)
-    
+    def eventVariants(self, eventNode: Dict) -> List[EventVariant]:
+        structName = self.getConnectedStructName(eventNode['id'])
+        if not structName:
+            return []
+        # Use the struct name as the event name
+        structNode = self.getFirstConnectedNode(eventNode['id'], 'STRUCT')
+        return [EventVariant(structName, self.sourceOf([eventNode, structNode]))]
+
     def getConnectedStructName(self, nodeId: str) -> str:
-        edges = self.getNodeEdges(nodeId)
-        for connectedNodeId in edges['connectedNodes']:
-            node = next(
-                (node for node in self.jsonData['nodeData'] if node['id'] == connectedNodeId), 
-                None
-            )
-            if node and node['data']['type'] == 'STRUCT':
-                return node['data'].get('name', 'UnnamedStruct')
+        structNode = self.getFirstConnectedNode(nodeId, 'STRUCT')
+        if structNode:
+            return structNode['data'].get('name', 'UnnamedStruct')
         return ""
     
-    def generateEmitEventFunction(self, eventNode: Dict) -> str:
-        structName = self.getConnectedStructName(eventNode['id'])
-        
-        if not structName:
-            raise ValueError(f"Event must be connected to a struct")
-            
-        # Get the struct node to access its fields - TODO very inefficient
-        structNode = next(
-            (node for node in self.jsonData['nodeData'] 
-             if node['data']['type'] == 'STRUCT' and node['data'].get('name') == structName),
-            None
-        )
+    def generateEmitEventFunction(self, eventNode: Dict) -> Function:
+        structNode = self.getFirstConnectedNode(eventNode['id'], 'STRUCT')
         
         if not structNode:
-            raise ValueError(f"Could not find struct {structName}")
+            raise ValueError(f"Event must be connected to a struct")
             
+        structName = structNode['data'].get('name', 'UnnamedStruct')
         fields = self.getStructFields(structNode)
         
-        # Create parameters from struct fields
-        params = [f"{field['name']}: {field['type']}" for field in fields]
-        params_str = ", ".join(params)
-            
-        template = [
-            f"fn emit_{structName.lower()}(ref self: ContractState, {params_str})",
-            "{",
-            f"\tself.emit(Event::{structName}({structName} {{ {', '.join(field['name'] for field in fields)} }}));",
-            "}"
-        ]
-        
-        functionData = {'template': template}
-        self.addFunction(functionData)
-        return "\n".join(template)
+        fieldNodes = [node for field in fields for node in field['nodes']]
+        function = Function(
+            name=f"emit_{structName.lower()}",
+            self_mode='ref',
+            # Create parameters from struct fields
+            params=[Param(field['name'], field['type']) for field in fields],
+            return_type=None,
+            body=[f"\tself.emit(Event::{structName}({structName} {{ {', '.join(field['name'] for field in fields)} }}));"],
+            brace_on_new_line=True,
+            source=self.sourceOf([eventNode, structNode] + fieldNodes),
+        )
+        self.addFunction(function)
+        return function
 
-    def generateConstructor(self, constructorNode: Dict) -> str:
-        # Get the edges to find connected typed variables
-        edges = self.getNodeEdges(constructorNode['id'])
+    def generateConstructor(self, constructorNode: Dict) -> Function:
         parameters = []
+        sourceNodes = [constructorNode]
         
-        # Always include self parameter
-        parameters.append("ref self: ContractState")
-        
-        # Process each connected node
-        for connectedNodeId in edges['connectedNodes']:
-            # Find TypedVariable nodes
-            typedVarNode = next(
-                (node for node in self.jsonData['nodeData'] 
-                 if node['id'] == connectedNodeId and node['data']['type'] == 'TYPED_VAR'),
-                None
-            )
+        # Process each connected typed variable
+        for typedVarNode in self.getConnectedNodes(constructorNode['id'], 'TYPED_VAR'):
+            # Get the variable name
+            varName = typedVarNode['data'].get('label', 'unnamed')
             
-            if typedVarNode:
-                # Get the variable name
-                varName = typedVarNode['data'].get('label', 'unnamed')
-                
-                # Get the type from connected primitive node
-                varType = None
-                varEdges = self.getNodeEdges(typedVarNode['id'])
-                for typeNodeId in varEdges['connectedNodes']:
-                    typeNode = next(
-                        (node for node in self.jsonData['nodeData'] if node['id'] == typeNodeId),
-                        None
-                    )
-                    if typeNode and typeNode['data']['type'] == 'PRIM_TYPE':
-                        varType = self.getPrimitiveType(typeNode)
-                        break
-                
-                if varType:
-                    parameters.append(f"{varName}: {varType}")
+            # Get the type from connected primitive node
+            typeNode = self.getFirstConnectedNode(typedVarNode['id'], 'PRIM_TYPE')
+            if typeNode:
+                parameters.append(Param(varName, self.getPrimitiveType(typeNode)))
+                sourceNodes.extend([typedVarNode, typeNode])
         
         # Get code from connected code block
         code_content = ""
-        for connectedNodeId in edges['connectedNodes']:
-            codeNode = next(
-                (node for node in self.jsonData['nodeData'] 
-                 if node['id'] == connectedNodeId and node['data']['type'] == 'CODE'),
-                None
-            )
-            if codeNode:
-                code_content = codeNode['data'].get('code', "").strip()
-                break
-        
-        # Build the constructor template
-        template = [
-            "#[constructor]",
-            f"fn constructor({', '.join(parameters)}) {{",
-            f"\t{code_content}"
-            "\t",
-            "}"
-        ]
-        
-        functionData = {
-            'template': template,
-            'is_constructor': True
-        }
-        self.addFunction(functionData)
-        return "\n".join(template)
+        codeNode = self.getFirstConnectedNode(constructorNode['id'], 'CODE')
+        if codeNode:
+            code_content = codeNode['data'].get('code', "").strip()
+            sourceNodes.append(codeNode)
+        
+        function = Function(
+            name='constructor',
+            self_mode='ref',
+            params=parameters,
+            return_type=None,
+            body=[f"\t{code_content}\t"],
+            attributes=["#[constructor]"],
+            external=False,  # Not part of the interface or the ABI impl
+            source=self.sourceOf(sourceNodes),
+        )
+        self.addFunction(function)
+        return function
 
     def build(self):
-        # Combine all components into a complete contract
-        contract_parts = []
-
-        # Add the interface block
-        contract_parts.append(self.buildInterfaceBlock())
-        contract_parts.append("")  # Add blank line for separation
-        
-        # Add the contract block (includes storage block, structs, events, and implementation block)
-        contract_parts.append(self.buildContractBlock())
-        return "\n\n".join(contract_parts)
+        """Emit the complete contract, recording self.sourceMap.
+
+        The source map lists ranges of the generated code and the node and
+        edge ids that produced them. Lines and columns are 1-based; a range
+        starts at the first non-blank column of its first line and `end` is
+        exclusive. Consecutive lines from the same nodes share one range.
+        """
+        emitter = CairoEmitter()
+        emitter.module(self.contractModule())
+        self.sourceMap = emitter.source_map
+        return emitter.getvalue()
 
     def parseNodes(self) -> List[Dict]:
         if 'nodeData' not in self.jsonData:
@@ -366,31 +318,45 @@ class ContractBuilder:
         return self.jsonData['nodeData']
 
     def getNodesByType(self, nodeType: str) -> List[Dict]:
-        nodes = self.parseNodes()
+        self.parseNodes()
         if nodeType == 'FUNCTION':
             # For functions, match either the node type (for setFunction, getFunction etc)
-            # or the data type for other function types
-            return [
-                node for node in nodes 
-                if (node['type'] in ['setFunction', 'getFunction', 'basicFunction'] or 
-                    node['data']['type'] == nodeType)
-            ]
-        return [node for node in nodes if node['data']['type'] == nodeType]
+            # or the data type for other function types, keeping document order
+            matches = {id(node): node for node in self.nodesByDataType.get(nodeType, [])}
+            for functionNodeType in ['setFunction', 'getFunction', 'basicFunction']:
+                for node in self.nodesByNodeType.get(functionNodeType, []):
+                    matches[id(node)] = node
+            return sorted(matches.values(), key=lambda node: self.nodePositions[id(node)])
+        return list(self.nodesByDataType.get(nodeType, []))
 
     def getNodeEdges(self, nodeId: str) -> Dict[str, List[Dict]]:
         if 'edgeData' not in self.jsonData:
             raise KeyError("JSON data does not contain 'edgeData' key")
             
-        edges = self.jsonData['edgeData']
-        connectedEdges = [edge for edge in edges if edge['source'] == nodeId or edge['target'] == nodeId]
+        self.recordRead(nodeId)
+        adjacent = self.adjacency.get(nodeId, [])
         
         return {
-            'connections': connectedEdges,
-            'connectedNodes': [
-                edge['target'] if edge['source'] == nodeId else edge['source']
-                for edge in connectedEdges
-            ]
+            'connections': [edge for edge, _ in adjacent],
+            'connectedNodes': [connectedNodeId for _, connectedNodeId in adjacent]
         }
+
+    def getConnectedNodes(self, nodeId: str, dataType: str) -> List[Dict]:
+        # Neighbouring nodes of the given data type, in edge order
+        if 'edgeData' not in self.jsonData:
+            raise KeyError("JSON data does not contain 'edgeData' key")
+
+        self.recordRead(nodeId)
+        connectedNodes = []
+        for _, connectedNodeId in self.adjacency.get(nodeId, []):
+            node = self.nodesById.get(connectedNodeId)
+            if node and node.get('data', {}).get('type') == dataType:
+                connectedNodes.append(node)
+        return connectedNodes
+
+    def getFirstConnectedNode(self, nodeId: str, dataType: str):
+        connectedNodes = self.getConnectedNodes(nodeId, dataType)
+        return connectedNodes[0] if connectedNodes else None
     
     def getPrimitiveType(self, primitiveNode: Dict) -> str:
         if primitiveNode['data']['type'] != 'PRIM_TYPE':
@@ -418,14 +384,19 @@ class ContractBuilder:
             
         return cleanName
     
+    def getStorageVarTypeNodes(self, storageVarNode) -> List[Dict]:
+        # The node getStorageVarType takes the type from
+        for connectedNodeId in self.getNodeEdges(storageVarNode['id'])['connectedNodes']:
+            connectedNode = self.nodesById.get(connectedNodeId)
+            if connectedNode and connectedNode['data']['type'] in ('PRIM_TYPE', 'COMPOUND_TYPE', 'STRUCT'):
+                return [connectedNode]
+        return []
+
     def getStorageVarType(self, storageVarNode) -> str:
         edges = self.getNodeEdges(storageVarNode['id'])
 
         for connectedNodeId in edges['connectedNodes']:
-            connectedNode = next(
-                (node for node in self.jsonData['nodeData'] if node['id'] == connectedNodeId), 
-                None
-            )
+            connectedNode = self.nodesById.get(connectedNodeId)
             
             if not connectedNode:
                 continue
@@ -441,143 +412,71 @@ class ContractBuilder:
 
     
     
-    def generateFunctionWithReturn(self, languageJson, functionName, storageNode, params):
-
-        template = languageJson["type"]["FUNCTION"].get('GET', {})
+    def generateTemplateFunction(self, languageJson, identifier, functionName, storageNode, values) -> Function:
+        # Fill a language.json function template for the given storage variable
+        template = languageJson["type"]["FUNCTION"].get(identifier, {})
         if not template:
             raise ValueError(f"No template found for function: {functionName}")
         
-        storageVarName = self.getStorageVarName(storageNode)
-        storageVarType = self.getStorageVarType(storageNode)
-        
-        functionData = template.copy()
-        
-        processedTemplate = []
-        for line in template['template']:
-            line = line.replace("{functionName}", functionName)
-            line = line.replace("{storageVarName}", storageVarName)
-            line = line.replace("{storageVarType}", storageVarType)
-            
-            if params:
-                for key, value in params.items():
-                    line = line.replace(f"{{{key}}}", value)
-            
-            processedTemplate.append(line)
-        
-        functionData['template'] = processedTemplate
-        self.addFunction(functionData)
-        return "\n".join(processedTemplate)
+        values = {
+            **values,
+            'functionName': functionName,
+            'storageVarName': self.getStorageVarName(storageNode),
+            'storageVarType': self.getStorageVarType(storageNode),
+        }
+        # The signature is data: parameter and return types are templates too
+        selfParam = next((param for param in template.get('parameters', []) if param['name'] == 'self'), {})
+        params = [param for param in template.get('parameters', []) if param['name'] != 'self']
+        types = render_template([param['type'] for param in params] + [template.get('return_type', '')], values)
+        function = Function(
+            name=functionName,
+            self_mode=selfParam.get('mode', 'ref'),
+            params=[Param(param['name'], paramType) for param, paramType in zip(params, types)],
+            return_type=types[-1] or None,
+            body=render_template(template['template'], values),
+        )
+        self.addFunction(function)
+        return function
+
+    def generateFunctionWithReturn(self, languageJson, functionName, storageNode, params):
+        return self.generateTemplateFunction(languageJson, 'GET', functionName, storageNode, params or {})
 
     def generateFunction(self, languageJson, functionName, storageNode, params):
-        template = languageJson["type"]["FUNCTION"].get('SET', {})
-        if not template:
-            raise ValueError(f"No template found for function: {functionName}")
-        
-        storageVarName = self.getStorageVarName(storageNode)
-        storageVarType = self.getStorageVarType(storageNode)
-        
-        functionData = template.copy()
-        
-        processedTemplate = []
-        for line in template['template']:
-            line = line.replace("{functionName}", functionName)
-            line = line.replace("{storageVarName}", storageVarName)
-            line = line.replace("{storageVarType}", storageVarType)
-            
-            if params:
-                for key, value in params.items():
-                    line = line.replace(f"{{{key}}}", value)
-            
-            processedTemplate.append(line)
-        
-        functionData['template'] = processedTemplate
-        self.addFunction(functionData)
-        return "\n".join(processedTemplate)
+        return self.generateTemplateFunction(languageJson, 'SET', functionName, storageNode, params or {})
 
     def generateIncrementFunction(self, languageJson, functionName, storageNode, amount):
-        template = languageJson["type"]["FUNCTION"].get('INCREMENT', {})
-        if not template:
-            raise ValueError(f"No template found for function: {functionName}")
-        
-        storageVarName = self.getStorageVarName(storageNode)
-        storageVarType = self.getStorageVarType(storageNode)
-        
-        functionData = template.copy()
-        
-        processedTemplate = []
-        for line in template['template']:
-            line = line.replace("{functionName}", functionName)
-            line = line.replace("{storageVarName}", storageVarName)
-            line = line.replace("{storageVarType}", storageVarType)
-            line = line.replace("{amount}", amount)
-            
-            processedTemplate.append(line)
-        
-        functionData['template'] = processedTemplate
-        self.addFunction(functionData)
-        return "\n".join(processedTemplate)
+        return self.generateTemplateFunction(languageJson, 'INCREMENT', functionName, storageNode, {'amount': amount})
 
     def generateDecrementFunction(self, languageJson, functionName, storageNode, amount):
-            template = languageJson["type"]["FUNCTION"].get('DECREMENT', {})
-            if not template:
-                raise ValueError(f"No template found for function: {functionName}")
-            
-            storageVarName = self.getStorageVarName(storageNode)
-            storageVarType = self.getStorageVarType(storageNode)
-            
-            functionData = template.copy()
-            
-            processedTemplate = []
-            for line in template['template']:
-                line = line.replace("{functionName}", functionName)
-                line = line.replace("{storageVarName}", storageVarName)
-                line = line.replace("{storageVarType}", storageVarType)
-                line = line.replace("{amount}", amount)
-                
-                processedTemplate.append(line)
-            
-            functionData['template'] = processedTemplate
-            self.addFunction(functionData)
-            return "\n".join(processedTemplate)
+        return self.generateTemplateFunction(languageJson, 'DECREMENT', functionName, storageNode, {'amount': amount})
 
-    def generateBasicFunction(self, functionNode: Dict) -> str:
+    def generateBasicFunction(self, functionNode: Dict) -> Function:
         # Get function name from node data
         function_name = functionNode['data'].get('name', 'unnamed_function')
         
         # Get parameters from node data
         parameters = functionNode['data'].get('parameters', [])
-        param_str = "self: @ContractState"  # Always include self parameter
-        if parameters:
-            param_str += ", " + ", ".join(f"{param['name']}: {param['type']}" for param in parameters)
             
         # Get return type if present
         return_type = functionNode['data'].get('returnType', '')
-        return_str = f" -> {return_type}" if return_type else ""
         
         # Get connected code node for function body
-        edges = self.getNodeEdges(functionNode['id'])
         code_content = "// No code implementation provided"
         
-        for connectedNodeId in edges['connectedNodes']:
-            codeNode = next(
-                (node for node in self.jsonData['nodeData'] 
-                 if node['id'] == connectedNodeId and node['data']['type'] == 'CODE'),
-                None
-            )
-            if codeNode:
-                code_content = codeNode['data'].get('code', code_content)
-                break
-        
-        # Build function template
-        template = [
-            f"fn {function_name}({param_str}){return_str} {{",
-            f"    {code_content}",
-            "}"
-        ]
-        
-        functionData = {'template': template}
-        self.addFunction(functionData)
-        return "\n".join(template)
+        codeNode = self.getFirstConnectedNode(functionNode['id'], 'CODE')
+        if codeNode:
+            code_content = codeNode['data'].get('code', code_content)
+        
+        function = Function(
+            name=function_name,
+            self_mode='snapshot',
+            params=[Param(param['name'], param['type']) for param in parameters],
+            return_type=return_type or None,
+            body=[f"    {code_content}"],
+            source=self.sourceOf([functionNode, codeNode]),
+        )
+        self.addFunction(function)
+        return function
 
     def generateFunctions(self, languageJson):
         # Process standard function nodes (GET, SET, etc.)
@@ -594,94 +493,260 @@ class ContractBuilder:
         eventNodes = self.getNodesByType('EVENT')
         
         # Process basic function nodes
-        basicFunctionNodes = [
-            node for node in self.jsonData.get('nodeData', [])
-            if node.get('data', {}).get('type') == 'BASIC_FUNCTION'
-        ]
+        basicFunctionNodes = self.nodesByDataType.get('BASIC_FUNCTION', [])
         
         # Generate standard functions
         for functionNode in functionNodes:
-            identifier = functionNode.get('data', {}).get('identifier')
-            function_name = functionNode.get('data', {}).get('name', 'unnamed_function')
-            edges = self.getNodeEdges(functionNode['id'])
-            
-            storageNode = None
-            for connectedNodeId in edges['connectedNodes']:
-                node = next(
-                    (node for node in self.jsonData.get('nodeData', [])
-                    if node.get('id') == connectedNodeId and 
-                        node.get('data', {}).get('type') == 'STORAGE_VAR'),
-                    None
-                )
-                if node:
-                    storageNode = node
-                    break
-            
-            if not storageNode:
-                print(f"Warning: No storage node found for function {functionNode.get('id')}")
-                continue
-
-            params = {}
-            for connectedNodeId in edges['connectedNodes']:
-                paramNode = next(
-                    (node for node in self.jsonData.get('nodeData', [])
-                    if node.get('id') == connectedNodeId and 
-                        node.get('data', {}).get('type') == 'PRIM_TYPE'),
-                    None
-                )
-                
-                if paramNode:
-                    paramName = paramNode['data'].get('name', 'param')
-                    paramType = self.getPrimitiveType(paramNode)
-                    params[paramName] = paramType
-            if identifier == 'SET':
-                self.generateFunction(languageJson, function_name, storageNode, params)
-            elif identifier == 'GET':
-                self.generateFunctionWithReturn(languageJson, function_name, storageNode, params)
-            elif identifier == 'INCREMENT':
-                amount = functionNode.get('data', {}).get('amount', '1')
-                self.generateIncrementFunction(
-                    languageJson,
-                    function_name,
-                    storageNode,
-                    amount
-                )
-            elif identifier == 'DECREMENT':
-                amount = functionNode.get('data', {}).get('amount', '1')
-                self.generateDecrementFunction(
-                    languageJson,
-                    function_name,
-                    storageNode,
-                    amount
-                )
+            self.functions.extend(self.unit('function', functionNode, lambda: self.functionsAddedBy(
+                lambda: self.generateStandardFunction(languageJson, functionNode)
+            )))
                 
         # Generate basic functions
         for functionNode in basicFunctionNodes:
-            self.generateBasicFunction(functionNode)
+            self.functions.extend(self.unit('basic_function', functionNode, lambda: self.functionsAddedBy(
+                lambda: self.generateBasicFunction(functionNode)
+            )))
                 
         # Generate event emission functions
         for eventNode in eventNodes:
-            self.generateEmitEventFunction(eventNode)
+            self.functions.extend(self.unit('emit', eventNode, lambda: self.functionsAddedBy(
+                lambda: self.generateEmitEventFunction(eventNode)
+            )))
+
+    def functionsAddedBy(self, generate) -> List[Dict]:
+        # Run a generate* method and take back the functions it added, so they can be reused as a unit
+        count = len(self.functions)
+        generate()
+        added = self.functions[count:]
+        del self.functions[count:]
+        return added
+
+    def generateStandardFunction(self, languageJson, functionNode: Dict):
+        identifier = functionNode.get('data', {}).get('identifier')
+        function_name = functionNode.get('data', {}).get('name', 'unnamed_function')
+        storageNode = self.getFirstConnectedNode(functionNode['id'], 'STORAGE_VAR')
+        
+        if not storageNode:
+            print(f"Warning: No storage node found for function {functionNode.get('id')}")
+            return
+
+        params = {}
+        paramNodes = self.getConnectedNodes(functionNode['id'], 'PRIM_TYPE')
+        for paramNode in paramNodes:
+            paramName = paramNode['data'].get('name', 'param')
+            paramType = self.getPrimitiveType(paramNode)
+            params[paramName] = paramType
+        functionCount = len(self.functions)
+        if identifier == 'SET':
+            self.generateFunction(languageJson, function_name, storageNode, params)
+        elif identifier == 'GET':
+            self.generateFunctionWithReturn(languageJson, function_name, storageNode, params)
+        elif identifier == 'INCREMENT':
+            amount = functionNode.get('data', {}).get('amount', '1')
+            self.generateIncrementFunction(
+                languageJson,
+                function_name,
+                storageNode,
+                amount
+            )
+        elif identifier == 'DECREMENT':
+            amount = functionNode.get('data', {}).get('amount', '1')
+            self.generateDecrementFunction(
+                languageJson,
+                function_name,
+                storageNode,
+                amount
+            )
+        if len(self.functions) > functionCount:
+            self.functions[-1].source = self.sourceOf([functionNode, storageNode] + paramNodes)
 
     def generateStorageVars(self):
         storageNodes = self.getNodesByType('STORAGE_VAR')
         for node in storageNodes:
-            storageVarName = self.getStorageVarName(node)
-            storageVarType = self.getStorageVarType(node)
-            self.storageVars.append(f"{storageVarName}: {storageVarType},")
+            self.storageVars.append(self.unit('storage', node, lambda: self.generateStorageVar(node)))
+
+    def generateStorageVar(self, node: Dict) -> StorageVar:
+        storageVarName = self.getStorageVarName(node)
+        storageVarType = self.getStorageVarType(node)
+        return StorageVar(storageVarName, storageVarType, self.sourceOf([node] + self.getStorageVarTypeNodes(node)))
     
-    def invoke(self, contractName: str):
-        languageMap = self.loadJson('language.json')
+    def validate(self, contractName: str = None, languageMap: Dict = None) -> List[Dict]:
+        """Structural and type problems with the graph, found in one pass over the indexed nodes and edges.
+
+        Each issue has a severity ('error' stops generate(), 'warning' marks
+        blocks that are left out of the contract), a code, a message and the
+        node_ids/edge_ids involved. Types are checked against the trait
+        table in language.json, so e.g. an INCREMENT on a bool is reported
+        here instead of by the Cairo compiler.
+        """
+        issues = []
+        languageMap = languageMap if languageMap is not None else get_language_map()
+        typeTable = languageMap.get('traits')
+
+        def report(severity, code, message, nodeIds=(), edgeIds=()):
+            issues.append({
+                'severity': severity,
+                'code': code,
+                'message': message,
+                'node_ids': list(nodeIds),
+                'edge_ids': list(edgeIds),
+            })
+
+        def neighbours(nodeId, dataTypes):
+            nodes = []
+            for _, connectedNodeId in self.adjacency.get(nodeId, []):
+                node = self.nodesById.get(connectedNodeId)
+                if node and node.get('data', {}).get('type') in dataTypes:
+                    nodes.append(node)
+            return nodes
+
+        def checkType(typeName, traits, what, nodeIds):
+            # Report a type missing from the table or lacking one of `traits`; True if it's usable
+            if typeTable is None:
+                return True
+            available = STRUCT_TRAITS if typeName in structNames else typeTable.get(typeName)
+            if available is None:
+                report('error', 'unknown_type', f"{what} has unsupported type {typeName!r}", nodeIds)
+                return False
+            missing = [trait for trait in traits if trait not in available]
+            if missing:
+                report('error', 'type_missing_trait',
+                       f"{what} needs a type implementing {', '.join(missing)}, but {typeName} does not", nodeIds)
+                return False
+            return True
+
+        def storageType(storageNode):
+            # The (type name, type node) getStorageVarType would use
+            typeNodes = neighbours(storageNode['id'], ('PRIM_TYPE', 'COMPOUND_TYPE', 'STRUCT'))
+            if not typeNodes:
+                return None, None
+            typeNode = typeNodes[0]
+            data = typeNode.get('data', {})
+            if data['type'] == 'PRIM_TYPE':
+                return data.get('identifier'), typeNode
+            if data['type'] == 'COMPOUND_TYPE':
+                return data.get('primitiveType'), typeNode
+            return data.get('name', 'UnnamedStruct'), typeNode
+
+        if contractName is not None and not contractName:
+            report('error', 'missing_contract_name', "Contract name is required")
+
+        seenNodeIds = set()
+        for node in self.jsonData.get('nodeData', []):
+            if node.get('id') in seenNodeIds:
+                report('warning', 'duplicate_node_id', f"More than one node has id {node.get('id')}", [node.get('id')])
+            seenNodeIds.add(node.get('id'))
+
+        for edge in self.jsonData.get('edgeData', []):
+            missing = [endpoint for endpoint in (edge.get('source'), edge.get('target')) if endpoint not in self.nodesById]
+            if missing:
+                report('error', 'dangling_edge', f"Edge {edge.get('id')} points to missing node {', '.join(map(str, missing))}",
+                       [endpoint for endpoint in (edge.get('source'), edge.get('target')) if endpoint in self.nodesById],
+                       [edge.get('id')])
+
+        # Generated names and the nodes that produce them, to find duplicates
+        storageNames = {}
+        functionNames = {}
+        structNames = {}
+        for node in self.nodesByDataType.get('STRUCT', []):
+            structNames.setdefault(node.get('data', {}).get('name', 'UnnamedStruct'), []).append(node['id'])
+
+        storageTypes = {}
+        for node in self.nodesByDataType.get('STORAGE_VAR', []):
+            storageVar = node.get('data', {}).get('storage_variable', '')
+            if not any(c.isalnum() or c == '_' for c in storageVar):
+                report('error', 'storage_var_unnamed', f"Storage variable {node['id']} has no valid name", [node['id']])
+            else:
+                storageNames.setdefault(self.getStorageVarName(node), []).append(node['id'])
+            typeName, typeNode = storageType(node)
+            if typeNode is None:
+                report('error', 'storage_var_untyped', f"Storage variable {node['id']} is not connected to a type", [node['id']])
+            elif checkType(typeName, ('starknet::Store',), f"Storage variable {node['id']}", [node['id'], typeNode['id']]):
+                storageTypes[node['id']] = (typeName, typeNode)
+
+        constructorIds = []
+        for node in self.getNodesByType('FUNCTION'):
+            data = node.get('data', {})
+            if data.get('identifier') == 'CONSTRUCTOR':
+                constructorIds.append(node['id'])
+            if data.get('identifier') not in TEMPLATE_FUNCTIONS:
+                continue
+            storageNodes = neighbours(node['id'], ('STORAGE_VAR',))
+            if not storageNodes:
+                report('warning', 'function_without_storage', f"Function {node['id']} is not connected to a storage variable and is skipped", [node['id']])
+                continue
+            functionNames.setdefault(data.get('name', 'unnamed_function'), []).append(node['id'])
+
+            # The storage variable's type has to support what the template does with it
+            identifier = data['identifier']
+            if storageNodes[0]['id'] in storageTypes:
+                typeName, typeNode = storageTypes[storageNodes[0]['id']]
+                template = languageMap.get('type', {}).get('FUNCTION', {}).get(identifier, {})
+                checkType(typeName, template.get('requires', []), f"{identifier} function {data.get('name', node['id'])}",
+                          [node['id'], storageNodes[0]['id'], typeNode['id']])
+            if identifier in ('INCREMENT', 'DECREMENT') and not NUMERIC_LITERAL_RE.fullmatch(str(data.get('amount', '1'))):
+                report('error', 'invalid_amount', f"{identifier} amount {data.get('amount')!r} is not an integer literal", [node['id']])
+        if len(constructorIds) > 1:
+            report('warning', 'multiple_constructors', "Only the first constructor is used", constructorIds[1:])
+        if constructorIds:
+            for typedVarNode in neighbours(constructorIds[0], ('TYPED_VAR',)):
+                for typeNode in neighbours(typedVarNode['id'], ('PRIM_TYPE',))[:1]:
+                    checkType(typeNode['data'].get('identifier'), ARGUMENT_TRAITS, f"Constructor argument {typedVarNode['id']}",
+                              [constructorIds[0], typedVarNode['id'], typeNode['id']])
+
+        for node in self.nodesByDataType.get('BASIC_FUNCTION', []):
+            functionNames.setdefault(node.get('data', {}).get('name', 'unnamed_function'), []).append(node['id'])
+
+        for node in self.nodesByDataType.get('STRUCT', []):
+            for typedVarNode in neighbours(node['id'], ('TYPED_VAR',)):
+                typeNodes = neighbours(typedVarNode['id'], ('PRIM_TYPE',))
+                if not typeNodes:
+                    report('warning', 'struct_field_untyped', f"Field {typedVarNode['id']} is not connected to a type and is skipped",
+                           [node['id'], typedVarNode['id']])
+                    continue
+                # Fields of the derived starknet::Event struct are serialized into the event
+                checkType(typeNodes[0]['data'].get('identifier'), ARGUMENT_TRAITS, f"Field {typedVarNode['id']}",
+                          [node['id'], typedVarNode['id'], typeNodes[0]['id']])
+
+        for node in self.nodesByDataType.get('EVENT', []):
+            structs = neighbours(node['id'], ('STRUCT',))
+            if not structs:
+                report('error', 'event_without_struct', f"Event {node['id']} is not connected to a struct", [node['id']])
+                continue
+            emitName = f"emit_{structs[0].get('data', {}).get('name', 'UnnamedStruct').lower()}"
+            functionNames.setdefault(emitName, []).append(node['id'])
+
+        for kind, names in (('storage variable', storageNames), ('function', functionNames), ('struct', structNames)):
+            for name, nodeIds in names.items():
+                if kind != 'storage variable' and not IDENTIFIER_RE.fullmatch(name):
+                    report('error', f"invalid_{kind}_name", f"{name!r} is not a valid {kind} name", nodeIds)
+                if len(nodeIds) > 1:
+                    report('error', f"duplicate_{kind.replace(' ', '_')}", f"{len(nodeIds)} blocks define the {kind} {name}", nodeIds)
+
+        return issues
+
+    def generate(self, contractName: str) -> str:
+        languageMap = get_language_map()
+        self.issues = self.validate(contractName, languageMap)
+        errors = [issue for issue in self.issues if issue['severity'] == 'error']
+        if errors:
+            raise GraphValidationError(errors)
+
+        if languageMap != self.previousLanguageMap:
+            # Function templates changed; nothing from the previous build can be reused
+            self.previousUnits = {}
+        self.languageMap = languageMap
 
         self.setName(contractName)
         
         self.generateStorageVars()
         self.generateFunctions(languageMap)
 
-        finalContract = self.build()
+        return self.build()
+
+    def invoke(self, contractName: str, outputFilePath: str = 'src/lib.cairo'):
+        finalContract = self.generate(contractName)
 
-        outputFilePath = f'src/lib.cairo'
-        
         if os.path.exists(outputFilePath):
             os.remove(outputFilePath)
 
@@ -692,38 +757,30 @@ class ContractBuilder:
 
         return outputFilePath
 
-    def buildStructs(self) -> str:
-        structNodes = self.getNodesByType('STRUCT')
-        if not structNodes:
-            return ""
-        
-        structBlocks = []
-        for structNode in structNodes:
-            structName = structNode['data'].get('name', 'UnnamedStruct')
-            fields = self.getStructFields(structNode)
-            
-            # Build the struct definition
-            structDef = [
-                "#[derive(Drop, starknet::Event)]",
-                f"pub struct {structName} {{",
-            ]
-            
+    def generateStructs(self) -> List[Struct]:
+        return [
+            self.unit('struct', structNode, lambda: self.generateStruct(structNode))
+            for structNode in self.getNodesByType('STRUCT')
+        ]
+
+    def generateStruct(self, structNode: Dict) -> Struct:
+        structName = structNode['data'].get('name', 'UnnamedStruct')
+        fields = self.getStructFields(structNode)
+
+        return Struct(
+            name=structName,
+            derives=list(STRUCT_TRAITS),
             # Add fields with their types
-            for field in fields:
-                structDef.append(f"\t{field['name']}: {field['type']},")
-            
-            structDef.append("}")
-            
-            # Add this struct to our collection
-            structBlocks.append("\n".join(structDef))
-        
-        # Return all structs joined with double newlines
-        return "\n\n".join(structBlocks)
+            fields=[
+                StructField(field['name'], field['type'], self.sourceOf([structNode] + field['nodes']))
+                for field in fields
+            ],
+            source=self.sourceOf([structNode]),
+        )
 
 if __name__ == "__main__":
-    # Create an empty dictionary as initial jsonData
-    builder = ContractBuilder({})
-    builder.jsonData = builder.loadJson('sample10.json')
+    with open('sample10.json', 'r') as file:
+        builder = ContractBuilder(json.load(file))
     
     # You can change this to any contract name you want
     builder.invoke("MyContract")
\ No newline at end of file
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+import aiohttp
+from starknet_py.common import create_sierra_compiled_contract
+from starknet_py.contract import Contract
+from starknet_py.hash.sierra_class_hash import compute_sierra_class_hash
+from starknet_py.net.account.account import Account
+from starknet_py.net.client_errors import ClientError
+from starknet_py.net.full_node_client import FullNodeClient
+from starknet_py.net.models.chains import StarknetChainId
+from starknet_py.net.signer.key_pair import KeyPair
+
+from deployment_registry import DeploymentRegistry, format_felt, get_deployment_registry
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+ACCOUNT_DIR = os.getenv('STARKNET_ACCOUNT_DIR', SERVER_DIR)
+
+NETWORKS = {
+    'testnet': {
+        'rpc_url': os.getenv('STARKNET_TESTNET_RPC', 'https://free-rpc.nethermind.io/sepolia-juno'),
+        'chain_id': StarknetChainId.SEPOLIA,
+    },
+    'mainnet': {
+        'rpc_url': os.getenv('STARKNET_MAINNET_RPC', 'https://free-rpc.nethermind.io/mainnet-juno'),
+        'chain_id': StarknetChainId.MAINNET,
+    },
+}
+
+
+class DeployError(Exception):
+    """A deploy that failed at `stage` (account, declare or deploy)."""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(message)
+        self.stage = stage
+
+
+def read_artifacts(target_dir: str, contract_name: str):
+    """The Sierra and CASM artifacts scarb built for a contract, as strings."""
+    artifacts = []
+    for suffix in ('contract_class', 'compiled_contract_class'):
+        path = os.path.join(target_dir, f"sample_contract_{contract_name}.{suffix}.json")
+        with open(path, 'r') as file:
+            artifacts.append(file.read())
+    return artifacts[0], artifacts[1]
+
+
+@lru_cache(maxsize=128)
+def compute_class_hash(sierra: str) -> int:
+    return compute_sierra_class_hash(create_sierra_compiled_contract(sierra))
+
+
+class DeployEngine:
+    """Declares and deploys built contracts over Starknet JSON-RPC.
+
+    Everything runs on one background event loop whose aiohttp session is
+    shared by the RPC client of every network. Each network's keystore is
+    decrypted once, on first use, and the account nonce is tracked locally
+    so concurrent deploys from the same account do not collide.
+
+    Classes are only declared when they are neither in the local registry
+    nor, if `check_on_chain` is set, already known to the node.
+    """
+
+    def __init__(self, networks: dict = None, account_dir: str = ACCOUNT_DIR, password: str = None,
+                 poll_interval: float = 2.0, registry: DeploymentRegistry = None, check_on_chain: bool = True):
+        self.networks = networks or NETWORKS
+        self.account_dir = account_dir
+        self.password = password
+        self.poll_interval = poll_interval
+        self.registry = registry or DeploymentRegistry(':memory:')
+        self.check_on_chain = check_on_chain
+        self.accounts = {}
+        self.nonces = {}
+        self.locks = {network: asyncio.Lock() for network in self.networks}
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.session = self.run(self.create_session())
+
+    async def create_session(self) -> aiohttp.ClientSession:
+        return aiohttp.ClientSession()
+
+    def run(self, coroutine):
+        """Run a coroutine on the engine's loop from synchronous code."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def account_paths(self, network: str):
+        return (
+            os.path.join(self.account_dir, f"account_{network}_ian_account.json"),
+            os.path.join(self.account_dir, f"account_{network}_ian_keystore.json"),
+        )
+
+    async def get_account(self, network: str) -> Account:
+        if network not in self.networks:
+            raise DeployError('account', f"Unknown network: {network}")
+        async with self.locks[network]:
+            if network not in self.accounts:
+                account_path, keystore_path = self.account_paths(network)
+                password = self.password or os.environ.get('KEYSTORE_PASSWORD', '')
+                try:
+                    with open(account_path, 'r') as file:
+                        address = json.load(file)['deployment']['address']
+                    # Decrypting the keystore is deliberately slow, so do it off the loop
+                    key_pair = await asyncio.to_thread(KeyPair.from_keystore, keystore_path, password)
+                except (OSError, KeyError, ValueError) as e:
+                    raise DeployError('account', f"Could not load the {network} account: {e}")
+
+                config = self.networks[network]
+                self.accounts[network] = Account(
+                    address=address,
+                    client=FullNodeClient(node_url=config['rpc_url'], session=self.session),
+                    key_pair=key_pair,
+                    chain=config['chain_id']
+                )
+            return self.accounts[network]
+
+    async def submit(self, network: str, account: Account, send):
+        """Sign and send one transaction with the account's next nonce and wait until it is accepted."""
+        async with self.locks[network]:
+            nonce = self.nonces.get(network)
+            if nonce is None:
+                nonce = await account.get_nonce()
+            try:
+                result = await send(nonce)
+            except Exception:
+                # The node may not have accepted it; fetch the nonce again next time
+                self.nonces.pop(network, None)
+                raise
+            self.nonces[network] = nonce + 1
+        try:
+            await account.client.wait_for_tx(result.hash, check_interval=self.poll_interval)
+        except Exception:
+            # Rejected or reverted: the nonce may not have been used on chain, so fetch it again next time
+            self.nonces.pop(network, None)
+            raise
+        return result
+
+    async def is_declared(self, client: FullNodeClient, class_hash: int) -> bool:
+        try:
+            await client.get_class_by_hash(class_hash)
+            return True
+        except ClientError:
+            return False
+
+    async def declare(self, network: str, account: Account, sierra: str, casm: str) -> dict:
+        class_hash = compute_class_hash(sierra)
+        if self.registry.contains(network, class_hash):
+            print(f"Class {format_felt(class_hash)} is in the local registry, skipping declare")
+            return {'class_hash': class_hash, 'transaction_hash': None, 'source': 'registry'}
+        if self.check_on_chain and await self.is_declared(account.client, class_hash):
+            print(f"Class {format_felt(class_hash)} is already declared")
+            self.registry.add(network, class_hash)
+            return {'class_hash': class_hash, 'transaction_hash': None, 'source': 'rpc'}
+
+        declare_result = await self.submit(network, account, lambda nonce: Contract.declare_v3(
+            account,
+            sierra,
+            compiled_contract_casm=casm,
+            nonce=nonce,
+            auto_estimate=True
+        ))
+        self.registry.add(network, declare_result.class_hash)
+        return {'class_hash': declare_result.class_hash, 'transaction_hash': declare_result.hash, 'source': 'declared'}
+
+    async def deploy_async(self, network: str, sierra: str, casm: str, constructor_args: list, on_stage=None) -> dict:
+        on_stage = on_stage or (lambda stage: None)
+        timings = {}
+        account = await self.get_account(network)
+        started_at = time.perf_counter()
+
+        on_stage('declaring')
+        try:
+            declared = await self.declare(network, account, sierra, casm)
+        except DeployError:
+            raise
+        except Exception as e:
+            raise DeployError('declare', str(e))
+        timings['declare'] = time.perf_counter() - started_at
+
+        abi = json.loads(sierra)['abi']
+        if isinstance(abi, str):
+            abi = json.loads(abi)
+        on_stage('deploying')
+        try:
+            deploy_result = await self.submit(network, account, lambda nonce: Contract.deploy_contract_v3(
+                account,
+                class_hash=declared['class_hash'],
+                abi=abi,
+                constructor_args=constructor_args,
+                nonce=nonce,
+                auto_estimate=True
+            ))
+        except Exception as e:
+            if declared['source'] == 'registry':
+                # The registry may be stale (e.g. a restarted devnet); check again next time
+                self.registry.remove(network, declared['class_hash'])
+            raise DeployError('deploy', str(e))
+        timings['deploy'] = time.perf_counter() - started_at - timings['declare']
+
+        return {
+            'network': network,
+            'address': format_felt(deploy_result.deployed_contract.address),
+            'class_hash': format_felt(declared['class_hash']),
+            'declared': declared['source'] == 'declared',
+            'declare_transaction_hash': format_felt(declared['transaction_hash']) if declared['transaction_hash'] else None,
+            'deploy_transaction_hash': format_felt(deploy_result.hash),
+            'timings': timings,
+        }
+
+    def deploy(self, network: str, sierra: str, casm: str, constructor_args: list, on_stage=None) -> dict:
+        """Declare (if needed) and deploy; `on_stage` is called with 'declaring' and 'deploying'."""
+        return self.run(self.deploy_async(network, sierra, casm, constructor_args, on_stage))
+
+    def close(self):
+        self.run(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_deploy_engine = None
+_deploy_engine_lock = threading.Lock()
+
+
+def get_deploy_engine() -> DeployEngine:
+    global _deploy_engine
+    with _deploy_engine_lock:
+        if _deploy_engine is None:
+            _deploy_engine = DeployEngine(
+                poll_interval=float(os.getenv('DEPLOY_POLL_INTERVAL', 2)),
+                registry=get_deployment_registry(),
+                check_on_chain=os.getenv('DEPLOY_CHECK_DECLARED_ON_CHAIN', 'true').lower() != 'false'
+            )
+        return _deploy_engine
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from deployer import handle_deploy_request
+from workspace import get_workspace_pool
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ACTIVE_STATUSES = {'queued', 'building', 'declaring', 'deploying'}
+
+
+def run_deploy(request: dict, on_stage) -> dict:
+    with get_workspace_pool().acquire() as workspace:
+        return handle_deploy_request(
+            request['network'],
+            request['contract_name'],
+            request['constructor_args'],
+            request['code'],
+            workspace.path,
+            on_stage=on_stage,
+            user_id=request.get('user_id')
+        )
+
+
+class DeployQueueFull(Exception):
+    """Raised by DeployJobQueue.submit when `max_active` deploys are already queued or running."""
+
+
+class DeployJobQueue:
+    """Runs deploys on a bounded worker pool and tracks them by job id.
+
+    A job moves through queued, building, declaring and deploying to done or
+    failed, recording how long it spent in each state. Every change is
+    written to one JSON file per job under `directory`, so results outlive
+    the request that submitted them; jobs that were still running when the
+    server stopped are marked failed on startup. Submitting again with the
+    same idempotency key returns the existing job instead of deploying twice.
+    At most `max_active` jobs are queued or running at once; new deploys
+    beyond that are rejected rather than queued without bound.
+    """
+
+    def __init__(self, runner, directory: str, workers: int = 4, max_jobs: int = 1000, max_active: int = 64):
+        self.runner = runner
+        self.directory = directory
+        self.max_jobs = max_jobs
+        self.max_active = max_active
+        self.jobs = {}
+        self.idempotency_keys = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='deploy')
+        os.makedirs(self.directory, exist_ok=True)
+        self.load()
+
+    def path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def load(self):
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), 'r') as file:
+                    job = json.load(file)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Ignoring unreadable deploy job {name}: {e}")
+                continue
+            if job['status'] in ACTIVE_STATUSES:
+                job['status'] = 'failed'
+                job['error'] = "Interrupted by a server restart"
+                self.save(job)
+            self.jobs[job['id']] = job
+            if job.get('idempotency_key'):
+                self.idempotency_keys[job['idempotency_key']] = job['id']
+
+    def save(self, job: dict):
+        tmp_path = f"{self.path(job['id'])}.tmp"
+        with open(tmp_path, 'w') as file:
+            json.dump(job, file)
+        os.replace(tmp_path, self.path(job['id']))
+
+    def submit(self, request: dict, idempotency_key: str = None):
+        """Queue a deploy and return (job, created); raises DeployQueueFull when too many are active."""
+        with self.lock:
+            if idempotency_key and idempotency_key in self.idempotency_keys:
+                return self.snapshot(self.idempotency_keys[idempotency_key]), False
+            active = sum(1 for job in self.jobs.values() if job['status'] in ACTIVE_STATUSES)
+            if active >= self.max_active:
+                raise DeployQueueFull(f"{active} deploys are already queued or running")
+
+            now = time.time()
+            job = {
+                'id': uuid.uuid4().hex,
+                'status': 'queued',
+                'network': request['network'],
+                'contract_name': request['contract_name'],
+                'idempotency_key': idempotency_key,
+                'created_at': now,
+                'updated_at': now,
+                'timings': {},
+                'result': None,
+                'error': None,
+            }
+            self.jobs[job['id']] = job
+            if idempotency_key:
+                self.idempotency_keys[idempotency_key] = job['id']
+            self.save(job)
+            snapshot = self.snapshot(job['id'])
+
+        self.executor.submit(self.run_job, job['id'], request)
+        return snapshot, True
+
+    def snapshot(self, job_id: str) -> dict:
+        return json.loads(json.dumps(self.jobs[job_id]))
+
+    def get(self, job_id: str):
+        with self.lock:
+            return self.snapshot(job_id) if job_id in self.jobs else None
+
+    def set_status(self, job_id: str, status: str, **fields):
+        with self.lock:
+            job = self.jobs[job_id]
+            now = time.time()
+            job['timings'][job['status']] = job['timings'].get(job['status'], 0) + now - job['updated_at']
+            job['status'] = status
+            job['updated_at'] = now
+            job.update(fields)
+            if status not in ACTIVE_STATUSES:
+                job['timings']['total'] = now - job['created_at']
+            self.save(job)
+
+    def run_job(self, job_id: str, request: dict):
+        try:
+            result = self.runner(request, lambda stage: self.set_status(job_id, stage))
+        except Exception as e:
+            result = {'success': False, 'stage': 'internal', 'error': str(e)}
+
+        if result['success']:
+            self.set_status(job_id, 'done', result=result)
+        else:
+            self.set_status(job_id, 'failed', result=result, error=result['error'])
+        self.prune()
+
+    def prune(self):
+        with self.lock:
+            if len(self.jobs) <= self.max_jobs:
+                return
+            finished = [job for job in self.jobs.values() if job['status'] not in ACTIVE_STATUSES]
+            finished.sort(key=lambda job: job['updated_at'])
+            for job in finished[:len(self.jobs) - self.max_jobs]:
+                del self.jobs[job['id']]
+                if self.idempotency_keys.get(job.get('idempotency_key')) == job['id']:
+                    del self.idempotency_keys[job['idempotency_key']]
+                try:
+                    os.remove(self.path(job['id']))
+                except FileNotFoundError:
+                    pass
+
+
+_deploy_queue = None
+_deploy_queue_lock = threading.Lock()
+
+
+def get_deploy_queue() -> DeployJobQueue:
+    global _deploy_queue
+    with _deploy_queue_lock:
+        if _deploy_queue is None:
+            _deploy_queue = DeployJobQueue(
+                run_deploy,
+                os.getenv('DEPLOY_JOBS_DIR', os.path.join(SERVER_DIR, '.deploy_jobs')),
+                workers=int(os.getenv('DEPLOY_WORKERS', 4)),
+                max_jobs=int(os.getenv('DEPLOY_MAX_JOBS', 1000)),
+                max_active=int(os.getenv('DEPLOY_MAX_ACTIVE', 64))
+            )
+        return _deploy_queue
@@ -1,55 +1,90 @@
-import subprocess
-import re
+import hashlib
 import os
+import time
 from dotenv import load_dotenv
 
+from build_cache import copy_artifacts, get_build_cache
+from compile_workers import get_compile_pool
+from deploy_engine import DeployError, get_deploy_engine, read_artifacts
+from deployment_registry import get_deployment_registry
+from diagnostics import DiagnosticMapper, parse_diagnostics
+
 load_dotenv()
 
-def save_code_to_file(code: str):
-    if os.path.exists('src/lib.cairo'):
-        os.remove('src/lib.cairo')
-    with open('src/lib.cairo', 'w') as file:
+
+def save_code_to_file(code: str, workspace_dir: str = '.'):
+    source_path = os.path.join(workspace_dir, 'src', 'lib.cairo')
+    if os.path.exists(source_path):
+        os.remove(source_path)
+    with open(source_path, 'w') as file:
         file.write(code)
 
-def handle_deploy_request(network: str, contract_name: str, args: str):
-    try:
-        env = os.environ.copy()
-        if network == 'testnet':
-            env['DEPLOYED_NETWORK'] = 'testnet'  # or whatever network you want
-            env['RPC_ENDPOINT'] = 'https://free-rpc.nethermind.io/sepolia-juno'
-        else:
-            env['DEPLOYED_NETWORK'] = 'mainnet'
-            env['RPC_ENDPOINT'] = 'https://free-rpc.nethermind.io/mainnet-juno'
-        print(f"Running deployer.sh with contract name {contract_name}")
-        result = subprocess.run(['bash', './deployer.sh', contract_name, env['KEYSTORE_PASSWORD'], env['DEPLOYED_NETWORK'], env['RPC_ENDPOINT'], args], 
-                              capture_output=True, 
-                              text=True,
-                              check=True,
-                              env=env)
-        
-        # Find the contract address from the output
-        match = re.search(r'DEPLOYED_ADDRESS:(0x[a-fA-F0-9]+)', result.stdout)
-        if match:
-            return match.group(1)  # Returns just the address
-        else:
-            raise ValueError("Could not find contract address in output")
-            
-    except subprocess.CalledProcessError as e:
-        return f"Deployment failed: {e.stderr}"
-
-def handle_verify_request():
+def build_contract(code: str, workspace_dir: str = None) -> dict:
+    """Build code on a warm compile worker, or reuse an identical earlier successful build.
+
+    When workspace_dir is given the source and the built artifacts are
+    copied into it.
+    """
+    build_cache = get_build_cache()
+    key = build_cache.key(code)
+    target_dir = None
+    if workspace_dir is not None:
+        target_dir = os.path.join(workspace_dir, 'target', 'dev')
+        save_code_to_file(code, workspace_dir)
+
+    cached = build_cache.restore(key, target_dir)
+    if cached is not None:
+        print("Build cache hit")
+        return cached
+
+    def collect(result: dict, built_dir: str):
+        if not result['success']:
+            # Failures are rebuilt every time; see BuildCache
+            return
+        build_cache.put(key, result, built_dir)
+        if target_dir is not None:
+            copy_artifacts(built_dir, target_dir)
+
+    return get_compile_pool().build(code, collect)
+
+def handle_deploy_request(network: str, contract_name: str, constructor_args: list, code: str, workspace_dir: str = '.',
+                          on_stage=None, user_id: str = None) -> dict:
+    on_stage = on_stage or (lambda stage: None)
+    on_stage('building')
+    started_at = time.perf_counter()
+    build_result = build_contract(code, workspace_dir)
+    build_seconds = time.perf_counter() - started_at
+    if not build_result['success']:
+        return {'success': False, 'stage': 'build', 'error': build_result['output']}
+
+    network = 'testnet' if network == 'testnet' else 'mainnet'
+    print(f"Deploying {contract_name} to {network}")
     try:
-        result = subprocess.run(['bash', './verifier.sh'], 
-                              capture_output=True, 
-                              text=True,
-                              check=True)
-        # Check if output starts with BUILD_ERROR
-        if result.stdout.startswith('BUILD_ERROR:'):
-            print(f"Verification failed!")
-            return False
-        else:
-            print(f"Verification successful!")
-            return True
-    except subprocess.CalledProcessError as e:
+        sierra, casm = read_artifacts(os.path.join(workspace_dir, 'target', 'dev'), contract_name)
+        deployment = get_deploy_engine().deploy(network, sierra, casm, constructor_args, on_stage=on_stage)
+    except OSError as e:
+        return {'success': False, 'stage': 'build', 'error': str(e)}
+    except DeployError as e:
+        return {'success': False, 'stage': e.stage, 'error': str(e)}
+
+    deployment['timings']['build'] = build_seconds
+    deployment['id'] = get_deployment_registry().record(
+        deployment,
+        contract_name=contract_name,
+        source_hash=hashlib.sha256(code.encode()).hexdigest(),
+        constructor_args=constructor_args,
+        user_id=user_id
+    )
+    return {'success': True, **deployment}
+
+def handle_verify_request(code: str, graph: dict = None) -> dict:
+    """Build the code and return its compiler diagnostics, mapped to block nodes when the graph is given."""
+    build_result = build_contract(code)
+    diagnostics = parse_diagnostics(build_result['output'])
+    if graph and 'nodeData' in graph and 'edgeData' in graph:
+        diagnostics = DiagnosticMapper(graph).map(diagnostics, code)
+    if build_result['success']:
+        print(f"Verification successful!")
+    else:
         print(f"Verification failed!")
-        return False
\ No newline at end of file
+    return {'success': build_result['success'], 'diagnostics': diagnostics}
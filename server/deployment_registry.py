@@ -0,0 +1,187 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+LEGACY_DEPLOYMENTS_FILE = os.path.join(SERVER_DIR, 'deployed_contracts.txt')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deployments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    address TEXT NOT NULL,
+    network TEXT,
+    contract_name TEXT,
+    class_hash TEXT,
+    source_hash TEXT,
+    constructor_args TEXT,
+    declare_transaction_hash TEXT,
+    deploy_transaction_hash TEXT,
+    user_id TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deployments_address ON deployments (address);
+CREATE INDEX IF NOT EXISTS deployments_class_hash ON deployments (class_hash);
+CREATE INDEX IF NOT EXISTS deployments_source_hash ON deployments (source_hash);
+CREATE INDEX IF NOT EXISTS deployments_network ON deployments (network, created_at);
+CREATE INDEX IF NOT EXISTS deployments_user ON deployments (user_id, created_at);
+
+CREATE TABLE IF NOT EXISTS declared_classes (
+    network TEXT NOT NULL,
+    class_hash TEXT NOT NULL,
+    declared_at REAL NOT NULL,
+    PRIMARY KEY (network, class_hash)
+);
+"""
+
+# Filters accepted by find(), each backed by an index
+QUERY_FIELDS = ['address', 'network', 'class_hash', 'source_hash', 'user_id']
+
+
+def format_felt(value) -> str:
+    return f"0x{value:064x}" if isinstance(value, int) else value
+
+
+class DeploymentRegistry:
+    """Deployments and declared classes in a SQLite database.
+
+    Replaces the flat deployed_contracts.txt log; its lines are imported
+    (without network or class hash) the first time the database is created.
+    Also serves as the deploy engine's record of declared class hashes.
+    """
+
+    def __init__(self, path: str, legacy_file: str = None):
+        self.path = path
+        self.lock = threading.Lock()
+        created = path == ':memory:' or not os.path.exists(path)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            self.connection.executescript(SCHEMA)
+        if created and legacy_file and os.path.exists(legacy_file):
+            self.import_legacy_file(legacy_file)
+        else:
+            self.normalize_addresses()
+
+    def normalize_addresses(self):
+        # Databases created before imported addresses were normalised
+        with self.lock, self.connection:
+            rows = self.connection.execute(
+                "SELECT id, address FROM deployments WHERE length(address) != 66"
+            ).fetchall()
+            updates = []
+            for row in rows:
+                try:
+                    updates.append((format_felt(int(row['address'], 16)), row['id']))
+                except ValueError:
+                    continue
+            self.connection.executemany("UPDATE deployments SET address = ? WHERE id = ?", updates)
+
+    def import_legacy_file(self, legacy_file: str):
+        rows = []
+        with open(legacy_file, 'r') as file:
+            for line in file:
+                date, _, address = line.strip().partition(' - ')
+                try:
+                    created_at = datetime.strptime(date, '%Y-%m-%d %H:%M:%S').timestamp()
+                except ValueError:
+                    continue
+                try:
+                    # Same form find() normalises its filter to; the log has unpadded addresses
+                    address = format_felt(int(address, 16))
+                except ValueError:
+                    pass
+                rows.append((address, created_at))
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT INTO deployments (address, created_at) VALUES (?, ?)", rows)
+        print(f"Imported {len(rows)} deployments from {legacy_file}")
+
+    def record(self, deployment: dict, contract_name: str = None, source_hash: str = None,
+               constructor_args: list = None, user_id: str = None) -> int:
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                """INSERT INTO deployments (address, network, contract_name, class_hash, source_hash, constructor_args,
+                                            declare_transaction_hash, deploy_transaction_hash, user_id, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    deployment['address'],
+                    deployment.get('network'),
+                    contract_name,
+                    deployment.get('class_hash'),
+                    source_hash,
+                    json.dumps(constructor_args) if constructor_args is not None else None,
+                    deployment.get('declare_transaction_hash'),
+                    deployment.get('deploy_transaction_hash'),
+                    user_id,
+                    time.time()
+                )
+            )
+            return cursor.lastrowid
+
+    def find(self, limit: int = 50, offset: int = 0, **filters) -> list:
+        """Deployments matching every given filter, newest first."""
+        unknown = set(filters) - set(QUERY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown deployment filters: {', '.join(sorted(unknown))}")
+        for field in ('address', 'class_hash'):
+            if filters.get(field):
+                # Match however the caller padded the felt
+                try:
+                    filters[field] = format_felt(int(filters[field], 16))
+                except ValueError:
+                    pass
+        conditions = [f"{field} = ?" for field in QUERY_FIELDS if filters.get(field) is not None]
+        values = [filters[field] for field in QUERY_FIELDS if filters.get(field) is not None]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT * FROM deployments {where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+                values + [limit, offset]
+            ).fetchall()
+
+        deployments = []
+        for row in rows:
+            deployment = dict(row)
+            if deployment['constructor_args'] is not None:
+                deployment['constructor_args'] = json.loads(deployment['constructor_args'])
+            deployments.append(deployment)
+        return deployments
+
+    def contains(self, network: str, class_hash) -> bool:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM declared_classes WHERE network = ? AND class_hash = ?",
+                (network, format_felt(class_hash))
+            ).fetchone()
+        return row is not None
+
+    def add(self, network: str, class_hash):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO declared_classes (network, class_hash, declared_at) VALUES (?, ?, ?)",
+                (network, format_felt(class_hash), time.time())
+            )
+
+    def remove(self, network: str, class_hash):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "DELETE FROM declared_classes WHERE network = ? AND class_hash = ?",
+                (network, format_felt(class_hash))
+            )
+
+
+_deployment_registry = None
+_deployment_registry_lock = threading.Lock()
+
+
+def get_deployment_registry() -> DeploymentRegistry:
+    global _deployment_registry
+    with _deployment_registry_lock:
+        if _deployment_registry is None:
+            _deployment_registry = DeploymentRegistry(
+                os.getenv('DEPLOYMENTS_DB', os.path.join(SERVER_DIR, 'deployments.db')),
+                legacy_file=LEGACY_DEPLOYMENTS_FILE
+            )
+        return _deployment_registry
@@ -0,0 +1,203 @@
+import re
+from typing import Dict, List
+
+from contract_builder import ContractBuilder
+
+HEADER_RE = re.compile(r'^(error|warning)(?:\[(\w+)\])?: (.*)$')
+LOCATION_RE = re.compile(r'^\s*--> (.+?):(\d+):(\d+)\s*$')
+FN_RE = re.compile(r'\bfn\s+(\w+)')
+STRUCT_RE = re.compile(r'^\s*(?:pub\s+)?struct\s+(\w+)')
+ENUM_RE = re.compile(r'^\s*(?:pub\s+)?enum\s+(\w+)')
+SCOPE_END_RE = re.compile(r'^\s*(?:mod|trait|impl)\s')
+FIELD_RE = re.compile(r'^\s*(\w+)\s*:')
+
+
+def relative_source_path(path: str) -> str:
+    # Workspaces live in temporary directories; report paths relative to the project
+    if '/src/' in path:
+        return "src/" + path.rsplit('/src/', 1)[1]
+    return path
+
+
+def parse_diagnostics(output: str) -> List[Dict]:
+    """Errors and warnings from `scarb build` output.
+
+    Each diagnostic has file, line, column, severity, message and code;
+    location fields are None for diagnostics that do not point into a file.
+    """
+    diagnostics = []
+    current = None
+    for line in output.splitlines():
+        header = HEADER_RE.match(line)
+        if header:
+            severity, code, message = header.groups()
+            if message.startswith('could not compile'):
+                # Scarb's summary line, not a diagnostic of its own
+                current = None
+                continue
+            current = {
+                'file': None,
+                'line': None,
+                'column': None,
+                'severity': severity,
+                'message': message.strip(),
+                'code': code,
+            }
+            diagnostics.append(current)
+            continue
+
+        if current is None or current['file'] is not None:
+            continue
+        location = LOCATION_RE.match(line)
+        if location:
+            current['file'] = relative_source_path(location.group(1))
+            current['line'] = int(location.group(2))
+            current['column'] = int(location.group(3))
+        elif line.strip():
+            current['message'] += "\n" + line.strip()
+        else:
+            current = None
+    return diagnostics
+
+
+def declaration(line: str):
+    function = FN_RE.search(line)
+    if function:
+        return 'fn', function.group(1)
+    struct = STRUCT_RE.match(line)
+    if struct:
+        return 'struct', struct.group(1)
+    enum = ENUM_RE.match(line)
+    if enum:
+        return 'enum', enum.group(1)
+    return None
+
+
+def enclosing_declaration(lines: List[str], index: int, column: int = 1):
+    """The (kind, name) of the fn, struct or enum whose signature or body contains column `column` of lines[index]."""
+    if declaration(lines[index]):
+        return declaration(lines[index])
+    if SCOPE_END_RE.match(lines[index]):
+        # A mod, trait or impl header is not inside any declaration
+        return None
+    # Walk up, tracking braces, to the first declaration whose block is still open
+    # at the position; braces after it on the same line don't enclose it
+    before = lines[index][:max(column - 1, 0)]
+    depth = before.count('}') - before.count('{')
+    for line in reversed(lines[:index]):
+        depth += line.count('}') - line.count('{')
+        found = declaration(line)
+        if found and depth < 0:
+            return found
+        if SCOPE_END_RE.match(line):
+            return None
+    return None
+
+
+class DiagnosticMapper:
+    """Maps diagnostics to the block nodes that produced the offending code.
+
+    When the code is exactly what the graph generates, the builder's source
+    map gives the nodes and edges behind every line. Otherwise (the user has
+    edited the generated code by hand) the generated contract still names
+    every declaration after a node (function names, storage variables,
+    struct names), so a diagnostic is attributed to the declaration it
+    falls inside.
+    """
+
+    def __init__(self, graph: Dict):
+        self.graph = graph
+        self.builder = ContractBuilder(graph)
+
+    def source_map(self, code: str):
+        """The builder's source map if the graph generates exactly `code`, else None."""
+        contractName = self.graph.get('contractName')
+        if not contractName:
+            return None
+        builder = ContractBuilder(self.graph)
+        try:
+            generated = builder.generate(contractName)
+        except Exception:
+            return None
+        return builder.sourceMap if generated == code else None
+
+    def mapped_ids(self, sourceMap: List[Dict], lineNumber: int):
+        """Node and edge ids of the source map range covering the line."""
+        for entry in sourceMap:
+            if entry['start']['line'] <= lineNumber <= entry['end']['line']:
+                return entry['node_ids'], entry['edge_ids']
+        return [], []
+
+    def function_node_ids(self, name: str) -> List[str]:
+        builder = self.builder
+        nodeIds = []
+        for node in builder.getNodesByType('FUNCTION') + builder.nodesByDataType.get('BASIC_FUNCTION', []):
+            data = node.get('data', {})
+            # Unnamed functions are generated as unnamed_function, like ContractBuilder does
+            if data.get('name', 'unnamed_function') == name or (name == 'constructor' and data.get('identifier') == 'CONSTRUCTOR'):
+                nodeIds.append(node['id'])
+                nodeIds.extend(codeNode['id'] for codeNode in builder.getConnectedNodes(node['id'], 'CODE'))
+        for eventNode in builder.getNodesByType('EVENT'):
+            structNode = builder.getFirstConnectedNode(eventNode['id'], 'STRUCT')
+            if structNode and name == f"emit_{structNode['data'].get('name', 'UnnamedStruct').lower()}":
+                nodeIds.extend([eventNode['id'], structNode['id']])
+        return nodeIds
+
+    def struct_node_ids(self, name: str, field: str = None) -> List[str]:
+        builder = self.builder
+        nodeIds = []
+        for structNode in builder.getNodesByType('STRUCT'):
+            if structNode['data'].get('name', 'UnnamedStruct') != name:
+                continue
+            nodeIds.append(structNode['id'])
+            nodeIds.extend(
+                typedVarNode['id'] for typedVarNode in builder.getConnectedNodes(structNode['id'], 'TYPED_VAR')
+                if typedVarNode['data'].get('label') == field
+            )
+        return nodeIds
+
+    def storage_node_ids(self, name: str) -> List[str]:
+        nodeIds = []
+        for storageNode in self.builder.getNodesByType('STORAGE_VAR'):
+            try:
+                if self.builder.getStorageVarName(storageNode) == name:
+                    nodeIds.append(storageNode['id'])
+            except ValueError:
+                continue
+        return nodeIds
+
+    def node_ids(self, lines: List[str], lineNumber: int, column: int = 1) -> List[str]:
+        if not 1 <= lineNumber <= len(lines):
+            return []
+        line = lines[lineNumber - 1]
+        field = FIELD_RE.match(line)
+        declaration = enclosing_declaration(lines, lineNumber - 1, column or 1)
+        if declaration is None:
+            return []
+
+        kind, name = declaration
+        if kind == 'fn':
+            return self.function_node_ids(name)
+        if kind == 'struct' and name == 'Storage':
+            return self.storage_node_ids(field.group(1)) if field else []
+        if kind == 'struct':
+            return self.struct_node_ids(name, field.group(1) if field else None)
+        if kind == 'enum' and name == 'Event' and field:
+            return self.struct_node_ids(field.group(1))
+        return []
+
+    def map(self, diagnostics: List[Dict], code: str) -> List[Dict]:
+        lines = code.split("\n")
+        sourceMap = self.source_map(code) if diagnostics else None
+        for diagnostic in diagnostics:
+            inSource = diagnostic['file'] == 'src/lib.cairo' and diagnostic['line'] is not None
+            nodeIds, edgeIds = [], []
+            if inSource and sourceMap is not None:
+                # The code is exactly what the graph generates; lines the map
+                # doesn't cover are scaffolding no block produced
+                nodeIds, edgeIds = self.mapped_ids(sourceMap, diagnostic['line'])
+            elif inSource:
+                nodeIds = self.node_ids(lines, diagnostic['line'], diagnostic['column'])
+            diagnostic['node_ids'] = list(dict.fromkeys(nodeIds))
+            diagnostic['edge_ids'] = edgeIds
+        return diagnostics
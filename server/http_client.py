@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AsyncHTTPClient:
+    """Pooled keep-alive HTTP client for the agent tools.
+
+    Requests run on one background event loop sharing a single
+    httpx.AsyncClient, so concurrent tool calls (ToolNode runs them on
+    separate threads) are multiplexed over the same connection pool.
+    Transport errors and retryable statuses are retried with exponential
+    backoff, and successful JSON responses are cached for `cache_ttl`
+    seconds.
+    """
+
+    def __init__(self, timeout: float = 10.0, retries: int = 3, backoff: float = 0.5,
+                 cache_ttl: float = 300.0, cache_size: int = 1024, max_connections: int = 20):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.max_connections = max_connections
+        self.cache = OrderedDict()
+        self.cache_lock = threading.Lock()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.client = self.run(self.create_client())
+
+    async def create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        )
+
+    def run(self, coroutine):
+        """Run a coroutine on the client's loop from synchronous code."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def gather(self, *coroutines) -> list:
+        """Run several requests concurrently and return their results in order."""
+        async def gather_all():
+            return await asyncio.gather(*coroutines, return_exceptions=True)
+        return self.run(gather_all())
+
+    def cache_key(self, method: str, url: str, params, body, headers) -> str:
+        return json.dumps([method, url, params, body, sorted((headers or {}).items())], sort_keys=True, default=str)
+
+    def cache_get(self, key: str):
+        with self.cache_lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                del self.cache[key]
+                return None
+            self.cache.move_to_end(key)
+            return data
+
+    def cache_put(self, key: str, data):
+        with self.cache_lock:
+            self.cache[key] = (time.monotonic() + self.cache_ttl, data)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    async def request_json(self, method: str, url: str, params: dict = None, body=None, headers: dict = None):
+        # Mirror requests and drop unset query parameters
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        key = self.cache_key(method, url, params, body, headers)
+        cached = self.cache_get(key)
+        if cached is not None:
+            return cached
+
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self.client.request(method, url, params=params, json=body, headers=headers)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    response.raise_for_status()
+                    data = response.json()
+                    self.cache_put(key, data)
+                    return data
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(self.backoff * (2 ** attempt) * (1 + random.random() / 2))
+
+    async def get_json(self, url: str, params: dict = None, headers: dict = None):
+        return await self.request_json('GET', url, params=params, headers=headers)
+
+    async def post_json(self, url: str, body=None, headers: dict = None):
+        return await self.request_json('POST', url, body=body, headers=headers)
+
+    def close(self):
+        self.run(self.client.aclose())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> AsyncHTTPClient:
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = AsyncHTTPClient(
+                timeout=float(os.getenv('HTTP_TIMEOUT', 10)),
+                retries=int(os.getenv('HTTP_RETRIES', 3)),
+                cache_ttl=float(os.getenv('HTTP_CACHE_TTL', 300))
+            )
+        return _http_client
@@ -0,0 +1,234 @@
+"""Offline ingestion of documentation into the Cairo docs vectorstore.
+
+Every chunk is stored under the SHA-256 of its source and content, so a run
+only embeds chunks that are new or changed and deletes the ones that
+disappeared from a source. Pages are extracted lazily and new chunks are
+embedded in batches on a thread or process pool while earlier batches are
+written to the store. Run it whenever the documents change:
+
+    python ingest.py                                  # the Cairo book
+    python ingest.py documents/*.pdf documents/*.md   # several sources
+    python ingest.py --prune documents/*.pdf          # also drop sources not listed
+    python ingest.py --processes                      # embed on one process per CPU
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import chromadb
+from langchain_community.document_loaders import PyMuPDFLoader, TextLoader
+
+from cairo_rag import DB_PATH, PDF_PATH, SCRIPT_DIR, load_embedding_function, make_text_splitter
+
+TEXT_EXTENSIONS = {'.md', '.markdown', '.txt'}
+# LangChain's default collection, which cairo_rag opens through Chroma
+COLLECTION_NAME = 'langchain'
+
+
+def source_key(file_path: str) -> str:
+    # Stable across machines for documents that live next to the server
+    absolute_path = os.path.abspath(file_path)
+    if absolute_path.startswith(SCRIPT_DIR + os.sep):
+        return os.path.relpath(absolute_path, SCRIPT_DIR)
+    return absolute_path
+
+
+def chunk_id(source: str, content: str) -> str:
+    return hashlib.sha256(f"{source}\0{content}".encode()).hexdigest()
+
+
+def iter_source_pages(file_path: str):
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == '.pdf':
+        yield from PyMuPDFLoader(file_path=file_path).lazy_load()
+    elif extension in TEXT_EXTENSIONS:
+        yield from TextLoader(file_path, encoding='utf-8').lazy_load()
+    else:
+        raise ValueError(f"Unsupported document type: {file_path}")
+
+
+def iter_chunks(file_path: str):
+    """Yield a source's chunks page by page, tagged with their content hash."""
+    source = source_key(file_path)
+    text_splitter = make_text_splitter()
+    for page in iter_source_pages(file_path):
+        for chunk in text_splitter.split_documents([page]):
+            chunk.metadata['source'] = source
+            chunk.metadata['content_hash'] = chunk_id(source, chunk.page_content)
+            yield chunk
+
+
+def open_collection(db_path: str) -> chromadb.Collection:
+    # Embeddings are computed here, so write through chromadb directly rather than a LangChain store
+    client = chromadb.PersistentClient(path=db_path)
+    return client.get_or_create_collection(COLLECTION_NAME, metadata={"hnsw:space": "cosine"})
+
+
+def delete_ids(collection: chromadb.Collection, ids: list, batch_size: int):
+    for start in range(0, len(ids), batch_size):
+        collection.delete(ids=ids[start:start + batch_size])
+
+
+_worker_embedding_function = None
+
+
+def init_embedding_worker():
+    global _worker_embedding_function
+    _worker_embedding_function = load_embedding_function()
+
+
+def embed_in_worker(texts: list) -> list:
+    return _worker_embedding_function.embed_documents(texts)
+
+
+class EmbeddingPipeline:
+    """Embeds chunk batches on a pool and writes finished batches to Chroma.
+
+    At most two batches per worker are in flight, so memory stays bounded
+    no matter how large the source is. Threads share one in-process model,
+    so more than one thread rarely helps; processes each load their own.
+    """
+
+    def __init__(self, collection: chromadb.Collection, workers: int = 1, use_processes: bool = False):
+        self.collection = collection
+        self.use_processes = use_processes
+        if use_processes:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_embedding_worker
+            )
+            self.embedding_function = None
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers)
+            self.embedding_function = load_embedding_function()
+        self.max_in_flight = workers * 2
+        self.in_flight = deque()
+        self.written = 0
+        self.started_at = time.perf_counter()
+
+    def submit(self, chunks: list):
+        texts = [chunk.page_content for chunk in chunks]
+        if self.use_processes:
+            future = self.executor.submit(embed_in_worker, texts)
+        else:
+            future = self.executor.submit(self.embedding_function.embed_documents, texts)
+        self.in_flight.append((chunks, future))
+        while len(self.in_flight) >= self.max_in_flight:
+            self.write_next()
+
+    def write_next(self):
+        chunks, future = self.in_flight.popleft()
+        embeddings = future.result()
+        self.collection.upsert(
+            ids=[chunk.metadata['content_hash'] for chunk in chunks],
+            embeddings=embeddings,
+            documents=[chunk.page_content for chunk in chunks],
+            metadatas=[chunk.metadata for chunk in chunks]
+        )
+        self.written += len(chunks)
+        print(f"  {self.written} chunks embedded ({self.throughput():.1f} chunks/sec)")
+
+    def drain(self):
+        while self.in_flight:
+            self.write_next()
+
+    def throughput(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return self.written / elapsed if elapsed else 0.0
+
+    def close(self):
+        self.drain()
+        self.executor.shutdown()
+
+
+def ingest(file_paths: list, db_path: str = DB_PATH, prune: bool = False, batch_size: int = 256,
+           workers: int = 1, use_processes: bool = False) -> dict:
+    collection = open_collection(db_path)
+    pipeline = EmbeddingPipeline(collection, workers=workers, use_processes=use_processes)
+    summary = {'added': 0, 'deleted': 0, 'unchanged': 0}
+    sources = set()
+    started_at = time.perf_counter()
+
+    try:
+        for file_path in file_paths:
+            source = source_key(file_path)
+            sources.add(source)
+            existing = set(collection.get(where={"source": source}, include=[])['ids'])
+            seen = set()
+            added = 0
+            batch = []
+
+            for chunk in iter_chunks(file_path):
+                content_hash = chunk.metadata['content_hash']
+                if content_hash in seen:
+                    continue
+                seen.add(content_hash)
+                if content_hash in existing:
+                    continue
+                batch.append(chunk)
+                added += 1
+                if len(batch) >= batch_size:
+                    pipeline.submit(batch)
+                    batch = []
+
+            if batch:
+                pipeline.submit(batch)
+            pipeline.drain()
+
+            removed_ids = [content_hash for content_hash in existing if content_hash not in seen]
+            delete_ids(collection, removed_ids, batch_size)
+
+            print(f"{source}: {added} added, {len(removed_ids)} deleted, {len(seen) - added} unchanged")
+            summary['added'] += added
+            summary['deleted'] += len(removed_ids)
+            summary['unchanged'] += len(seen) - added
+    finally:
+        pipeline.close()
+
+    if prune:
+        stored = collection.get(include=['metadatas'])
+        stale_ids = [
+            stored_id for stored_id, metadata in zip(stored['ids'], stored['metadatas'])
+            if (metadata or {}).get('source') not in sources or 'content_hash' not in (metadata or {})
+        ]
+        delete_ids(collection, stale_ids, batch_size)
+        print(f"Pruned {len(stale_ids)} chunks from sources that were not ingested")
+        summary['deleted'] += len(stale_ids)
+
+    summary['seconds'] = time.perf_counter() - started_at
+    summary['chunks_per_second'] = pipeline.throughput()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally ingest documents into the Cairo docs vectorstore.")
+    parser.add_argument('documents', nargs='*', default=[PDF_PATH], help="PDF or markdown files to ingest")
+    parser.add_argument('--db', default=DB_PATH, help="Chroma persist directory")
+    parser.add_argument('--prune', action='store_true', help="Delete chunks from sources not listed (and legacy un-hashed chunks)")
+    parser.add_argument('--rebuild', action='store_true', help="Delete the whole vectorstore before ingesting")
+    parser.add_argument('--batch-size', type=int, default=256, help="Chunks per embedding batch and store write")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Embedding workers (default: 1 thread, or one process per CPU with --processes)")
+    parser.add_argument('--processes', action='store_true', help="Embed on a process pool instead of threads")
+    args = parser.parse_args()
+
+    if args.rebuild and os.path.exists(args.db):
+        shutil.rmtree(args.db)
+        print("Removed existing vectorstore")
+
+    summary = ingest(
+        args.documents,
+        db_path=args.db,
+        prune=args.prune,
+        batch_size=args.batch_size,
+        workers=args.workers or ((os.cpu_count() or 1) if args.processes else 1),
+        use_processes=args.processes
+    )
+    print(f"Done in {summary['seconds']:.1f}s: {summary['added']} added, {summary['deleted']} deleted, "
+          f"{summary['unchanged']} unchanged ({summary['chunks_per_second']:.1f} chunks/sec embedded)")
@@ -0,0 +1,87 @@
+import json
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+LANGUAGE_FILE = os.path.join(SERVER_DIR, 'language.json')
+
+PLACEHOLDER_RE = re.compile(r'\{([A-Za-z_]\w*)\}')
+
+
+@lru_cache(maxsize=256)
+def compile_template(lines: Tuple[str, ...]) -> Callable[[Dict[str, str]], List[str]]:
+    """A renderer that fills every {placeholder} of the template lines in a single pass.
+
+    Each line is split once into literal text and placeholder names, so
+    rendering only looks values up and joins the parts. Placeholders without
+    a value are left as written, and values are inserted as-is: a value that
+    itself contains "{name}" is not substituted again.
+    """
+    compiled = []
+    for line in lines:
+        # split() alternates literal text and placeholder names
+        parts = PLACEHOLDER_RE.split(line)
+        fields = [(index, parts[index], "{" + parts[index] + "}") for index in range(1, len(parts), 2)]
+        compiled.append((line, parts, fields))
+
+    def render(values: Dict[str, str]) -> List[str]:
+        get = values.get
+        rendered = []
+        for line, parts, fields in compiled:
+            if fields:
+                parts = parts.copy()
+                for index, name, placeholder in fields:
+                    parts[index] = get(name, placeholder)
+                line = "".join(parts)
+            rendered.append(line)
+        return rendered
+
+    return render
+
+
+def render_template(lines: List[str], values: Dict[str, str]) -> List[str]:
+    return compile_template(tuple(lines))(values)
+
+
+class LanguageMap:
+    """language.json, loaded once and reloaded when the file changes on disk."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.version = None
+        self.data = None
+
+    def get(self) -> Dict:
+        stat = os.stat(self.path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            if version != self.version:
+                try:
+                    with open(self.path, 'r') as file:
+                        data = json.load(file)
+                except json.JSONDecodeError:
+                    if self.data is None:
+                        raise ValueError(f"Invalid JSON format in file: {self.path}")
+                    # Keep serving the last good map until the file is fixed
+                    print(f"Ignoring invalid {self.path}, keeping the previously loaded language map")
+                    self.version = version
+                    return self.data
+                self.data = data
+                self.version = version
+            return self.data
+
+
+_language_map = None
+_language_map_lock = threading.Lock()
+
+
+def get_language_map() -> Dict:
+    global _language_map
+    with _language_map_lock:
+        if _language_map is None:
+            _language_map = LanguageMap(LANGUAGE_FILE)
+    return _language_map.get()
@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    id TEXT PRIMARY KEY,
+    query TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    answer TEXT NOT NULL,
+    context TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SemanticAnswerCache:
+    """Answers keyed by query embedding.
+
+    A lookup returns the stored answer of the most similar cached question
+    when its cosine similarity is at least `threshold`. Entries expire after
+    `ttl` seconds, the least recently used entry is evicted once
+    `max_entries` is reached, and the whole cache is dropped whenever the
+    vectorstore fingerprint it was built against changes.
+
+    Lookups are served from memory. Entries are persisted one row at a time
+    in a SQLite database, so adding an answer costs the same however large
+    the cache is. Each change is written under the same lock that guards
+    the in-memory entries, so the database always matches memory.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.95, ttl: float = 86400, max_entries: int = 1000):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.fingerprint = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.connection = None
+        self.load()
+
+    def load(self):
+        if not self.path:
+            return
+        try:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            with self.connection:
+                self.connection.executescript(SCHEMA)
+            row = self.connection.execute("SELECT value FROM metadata WHERE key = 'fingerprint'").fetchone()
+            rows = self.connection.execute(
+                "SELECT id, query, embedding, answer, context, created_at FROM answers ORDER BY created_at"
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Ignoring unreadable answer cache at {self.path}: {e}")
+            self.connection = None
+            return
+
+        self.fingerprint = row[0] if row else None
+        for key, query, embedding, answer, context, created_at in rows:
+            self.entries[key] = {
+                'id': key,
+                'query': query,
+                'embedding': np.frombuffer(embedding, dtype=np.float32),
+                'answer': answer,
+                'context': json.loads(context),
+                'created_at': created_at
+            }
+        # Older rows beyond max_entries, e.g. after lowering it
+        evicted = []
+        while len(self.entries) > self.max_entries:
+            evicted.append(self.entries.popitem(last=False)[0])
+        self.write(deleted=evicted)
+
+    def write(self, added: dict = None, deleted: list = (), clear: bool = False):
+        """Apply a change to the database; callers other than load() hold self.lock.
+
+        A change is one added entry and/or deleted ids, or clearing everything.
+        """
+        if self.connection is None or not (added or deleted or clear):
+            return
+        try:
+            with self.connection:
+                self._write(added, deleted, clear)
+        except sqlite3.Error as e:
+            print(f"Failed to update answer cache at {self.path}: {e}")
+
+    def _write(self, added: dict, deleted: list, clear: bool):
+        if clear:
+            self.connection.execute("DELETE FROM answers")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES ('fingerprint', ?)", (self.fingerprint,)
+            )
+        if deleted:
+            self.connection.executemany("DELETE FROM answers WHERE id = ?", [(key,) for key in deleted])
+        if added:
+            self.connection.execute(
+                "INSERT INTO answers (id, query, embedding, answer, context, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (added['id'], added['query'], added['embedding'].tobytes(), added['answer'],
+                 json.dumps(added['context']), added['created_at'])
+            )
+
+    def set_fingerprint(self, fingerprint: str):
+        """Invalidate every entry if the vectorstore changed since they were cached."""
+        with self.lock:
+            if self.fingerprint == fingerprint:
+                return
+            if self.entries:
+                print("Vectorstore changed, clearing answer cache")
+            self.entries.clear()
+            self.fingerprint = fingerprint
+            self.write(clear=True)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.write(clear=True)
+
+    def expire(self, now: float) -> list:
+        expired = [key for key, entry in self.entries.items() if now - entry['created_at'] > self.ttl]
+        for key in expired:
+            del self.entries[key]
+        return expired
+
+    def get(self, embedding):
+        query = normalize(embedding)
+        with self.lock:
+            self.write(deleted=self.expire(time.time()))
+
+            best_key, best_score = None, -1.0
+            if self.entries:
+                keys = list(self.entries.keys())
+                matrix = np.stack([self.entries[key]['embedding'] for key in keys])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                best_key, best_score = keys[best], float(scores[best])
+
+            if best_key is None or best_score < self.threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.entries.move_to_end(best_key)
+            entry = self.entries[best_key]
+            return {
+                'query': entry['query'],
+                'answer': entry['answer'],
+                'context': entry['context'],
+                'similarity': best_score
+            }
+
+    def put(self, query: str, embedding, answer: str, context: list):
+        key = uuid.uuid4().hex
+        entry = {
+            'id': key,
+            'query': query,
+            'embedding': normalize(embedding),
+            'answer': answer,
+            'context': context,
+            'created_at': time.time()
+        }
+        evicted = []
+        with self.lock:
+            self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                evicted.append(self.entries.popitem(last=False)[0])
+            self.write(added=entry, deleted=evicted)
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'threshold': self.threshold,
+                'ttl': self.ttl
+            }
+
+
+def normalize(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -0,0 +1,44 @@
+import json
+import os
+
+from build_cache import BuildCache
+
+
+def make_cache(tmp_path) -> BuildCache:
+    return BuildCache(str(tmp_path / 'cache'), project_dir=str(tmp_path))
+
+
+def built_dir(tmp_path) -> str:
+    target_dir = tmp_path / 'target'
+    target_dir.mkdir()
+    (target_dir / 'C.contract_class.json').write_text("{}")
+    return str(target_dir)
+
+
+def test_successful_build_is_restored(tmp_path):
+    cache = make_cache(tmp_path)
+    key = cache.key("mod C {}")
+    cache.put(key, {'success': True, 'output': ""}, built_dir(tmp_path))
+
+    restored_dir = tmp_path / 'restored'
+    assert cache.restore(key, str(restored_dir)) == {'success': True, 'output': ""}
+    assert os.listdir(restored_dir) == ['C.contract_class.json']
+
+
+def test_failed_build_is_not_cached(tmp_path):
+    cache = make_cache(tmp_path)
+    key = cache.key("mod C {")
+    cache.put(key, {'success': False, 'output': "error: Missing token '}'."}, built_dir(tmp_path))
+
+    assert cache.restore(key) is None
+    assert not os.path.exists(cache.entry_dir(key))
+
+
+def test_failed_build_left_on_disk_is_ignored(tmp_path):
+    cache = make_cache(tmp_path)
+    key = cache.key("mod C {")
+    os.makedirs(cache.entry_dir(key))
+    with open(os.path.join(cache.entry_dir(key), 'result.json'), 'w') as file:
+        json.dump({'success': False, 'output': "scarb: command not found"}, file)
+
+    assert cache.restore(key) is None
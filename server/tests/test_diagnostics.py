@@ -0,0 +1,62 @@
+import contextlib
+import io
+import json
+import os
+
+from contract_builder import ContractBuilder
+from diagnostics import DiagnosticMapper
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'example_jsons')
+
+
+def load_example(name: str) -> dict:
+    with open(os.path.join(EXAMPLES_DIR, name), 'r') as file:
+        graph = json.load(file)
+    graph['contractName'] = 'C'
+    return graph
+
+
+def generate(graph: dict) -> str:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ContractBuilder(graph).generate(graph['contractName'])
+
+
+def diagnostic(line: int, column: int) -> dict:
+    return {'file': 'src/lib.cairo', 'line': line, 'column': column, 'severity': 'error', 'message': "", 'code': None}
+
+
+def line_number(code: str, text: str) -> int:
+    return next(index for index, line in enumerate(code.split("\n"), 1) if line.strip().startswith(text))
+
+
+def map_one(graph: dict, code: str, line: int, column: int) -> dict:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DiagnosticMapper(graph).map([diagnostic(line, column)], code)[0]
+
+
+def test_header_lines_map_to_no_blocks():
+    # e.g. "impl doesn't match trait" errors point at the impl header
+    graph = load_example('basic_constructor.json')
+    code = generate(graph)
+    for header in ('impl C of', 'mod C'):
+        line = line_number(code, header)
+        column = code.split("\n")[line - 1].index(header) + 1
+        assert map_one(graph, code, line, column)['node_ids'] == []
+
+
+def test_header_lines_map_to_no_blocks_after_hand_edits():
+    graph = load_example('basic_constructor.json')
+    code = generate(graph) + "\n// edited"
+    for header in ('impl C of', 'mod C'):
+        line = line_number(code, header)
+        column = code.split("\n")[line - 1].index(header) + 1
+        assert map_one(graph, code, line, column)['node_ids'] == []
+
+
+def test_constructor_body_maps_to_constructor_blocks():
+    graph = load_example('basic_constructor.json')
+    constructorIds = [node['id'] for node in graph['nodeData'] if node['data'].get('identifier') == 'CONSTRUCTOR']
+    for code in (generate(graph), generate(graph) + "\n// edited"):
+        line = line_number(code, 'self.amount.write')
+        mapped = map_one(graph, code, line, 3)
+        assert constructorIds[0] in mapped['node_ids']
@@ -0,0 +1,86 @@
+import contextlib
+import copy
+import glob
+import io
+import json
+import os
+import random
+
+import pytest
+
+from bench_contract_builder import synthetic_graph
+from contract_builder import ContractBuilder
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'example_jsons')
+PRIMITIVES = ['u8', 'u32', 'u64', 'u128', 'u256', 'felt252', 'bool']
+# Random edits applied to each graph
+STEPS = 200
+
+
+def generate(graph: dict, previous: ContractBuilder = None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        builder = ContractBuilder(graph, previous=previous)
+        code = builder.generate(graph.get('contractName') or 'Bench')
+    return builder, code
+
+
+def random_edit(graph: dict, rng: random.Random, step: int) -> dict:
+    """A copy of the graph with one edit a user could make in the editor."""
+    graph = copy.deepcopy(graph)
+    nodes, edges = graph['nodeData'], graph['edgeData']
+    edit = rng.choice(['retype', 'rename', 'code', 'add_edge', 'remove_edge', 'remove_node', 'add_function'])
+    if edit == 'retype':
+        primitives = [node for node in nodes if node['data'].get('type') == 'PRIM_TYPE']
+        if primitives:
+            rng.choice(primitives)['data']['identifier'] = rng.choice(PRIMITIVES)
+    elif edit == 'rename':
+        named = [node for node in nodes if 'name' in node['data'] or 'storage_variable' in node['data']]
+        if named:
+            data = rng.choice(named)['data']
+            data['storage_variable' if 'storage_variable' in data else 'name'] = f"renamed_{step}"
+    elif edit == 'code':
+        codeNodes = [node for node in nodes if node['data'].get('type') == 'CODE']
+        if codeNodes:
+            rng.choice(codeNodes)['data']['code'] = f"let x = {step};\nx"
+    elif edit == 'add_edge' and len(nodes) > 1:
+        source, target = rng.sample(nodes, 2)
+        edges.append({"id": f"xy-edge__{source['id']}-{target['id']}-{step}", "source": source['id'], "target": target['id']})
+    elif edit == 'remove_edge' and edges:
+        edges.pop(rng.randrange(len(edges)))
+    elif edit == 'remove_node' and nodes:
+        removed = nodes.pop(rng.randrange(len(nodes)))
+        graph['edgeData'] = [edge for edge in edges if removed['id'] not in (edge['source'], edge['target'])]
+    elif edit == 'add_function':
+        nodes.append({"id": f"basicFunction_{step}", "type": "basicFunction", "data": {"type": "BASIC_FUNCTION", "name": f"fn_{step}"}})
+        nodes.append({"id": f"code_{step}", "type": "code", "data": {"type": "CODE", "code": f"// step {step}"}})
+        edges.append({"id": f"xy-edge__code_{step}-basicFunction_{step}", "source": f"code_{step}", "target": f"basicFunction_{step}"})
+    return graph
+
+
+def graphs() -> list:
+    params = [pytest.param(0, synthetic_graph(200), id='synthetic_200')]
+    for seed, path in enumerate(sorted(glob.glob(os.path.join(EXAMPLES_DIR, '*.json'))), 1):
+        with open(path, 'r') as file:
+            params.append(pytest.param(seed, json.load(file), id=os.path.basename(path)))
+    return params
+
+
+@pytest.mark.parametrize('seed, graph', graphs())
+def test_incremental_build_matches_full_rebuild(seed, graph):
+    rng = random.Random(seed)
+    previous, _ = generate(graph)
+    for step in range(STEPS):
+        graph = random_edit(graph, rng, step)
+        try:
+            full, fullCode = generate(graph)
+        except Exception as e:
+            # The edit broke the graph; the incremental build must fail the same way
+            with pytest.raises(type(e)) as incrementalError:
+                generate(graph, previous)
+            assert type(incrementalError.value) is type(e) and str(incrementalError.value) == str(e), \
+                f"step {step}: incremental build failed differently"
+            continue
+        incremental, incrementalCode = generate(graph, previous)
+        assert incrementalCode == fullCode, f"step {step}: generated code differs"
+        assert incremental.sourceMap == full.sourceMap, f"step {step}: source map differs"
+        previous = incremental
@@ -1,13 +1,24 @@
-from typing import List, Dict
+import json
+from typing import Any, List, Dict
 
 
-def extract_constructor_args(constructor_args: List[Dict[str, str]]) -> str:
-    string_args = ""
+def parse_constructor_args(constructor_args: List[Dict[str, str]]) -> List[Any]:
+    """Constructor values from the client in the Python form starknet.py serializes by ABI type."""
+    values = []
     for arg in constructor_args:
+        value = str(arg.get("value", "")).strip()
         if arg.get("type") == "ByteArray":
-            string_args += f' bytearray:str:{arg.get("value")}'
-        elif arg.get("type") == "u256":
-            string_args += f' u256:{arg.get("value")}'
+            values.append(value)
+        elif arg.get("type") == "bool":
+            values.append(value.lower() in ("true", "1"))
         else:
-            string_args += f' {arg.get("value")}'
-    return string_args.strip()
\ No newline at end of file
+            try:
+                values.append(int(value, 16) if value.lower().startswith("0x") else int(value))
+            except ValueError:
+                # Plain text for a felt252 is encoded as a short string
+                values.append(value)
+    return values
+
+def sse_event(event: Dict) -> str:
+    """Format a {"type": ..., ...} event as a server-sent event."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
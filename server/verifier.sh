@@ -1,23 +1,15 @@
 #!/bin/bash
 
-echo "Deleting everything in target/dev"
+echo "Deleting previous build artifacts in target/dev"
 
-# 1. Delete everything in target/dev
-rm -rf target/dev/*
-
-echo "Asserting deletion succeeded"
-
-# 2. Assert directory is empty
-if [ "$(ls -A target/dev 2>/dev/null)" ]; then
-    echo "Error: target/dev is not empty"
-    exit 1
-fi
+# 1. Delete the previous contract artifacts but keep Scarb's incremental cache
+find target/dev -maxdepth 1 -type f -delete 2>/dev/null
 
 echo "Moving into directory"
 
 echo "Current directory: $(pwd)\nBuilding contract"
 
-# 3. Run scarb build and capture output
+# 2. Run scarb build and capture output
 BUILD_OUTPUT=$(scarb build 2>&1)
 BUILD_STATUS=$?
 
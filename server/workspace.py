@@ -0,0 +1,118 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from contextlib import contextmanager
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Project files every scratch workspace needs to run `scarb build`
+TEMPLATE_FILES = ['Scarb.toml', 'Scarb.lock', 'snfoundry.toml']
+
+def link_or_copy(source: str, destination: str):
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+class Workspace:
+    """A scratch Scarb project owned by a single request."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @property
+    def source_path(self) -> str:
+        return os.path.join(self.path, 'src', 'lib.cairo')
+
+    @property
+    def target_dir(self) -> str:
+        return os.path.join(self.path, 'target', 'dev')
+
+    def write_source(self, code: str):
+        with open(self.source_path, 'w') as file:
+            file.write(code)
+
+    def read_source(self) -> str:
+        with open(self.source_path, 'r') as file:
+            return file.read()
+
+    def reset(self):
+        # Drop the previous request's source but keep target/ so Scarb's
+        # incremental cache survives between builds
+        if os.path.exists(self.source_path):
+            os.remove(self.source_path)
+
+
+class WorkspacePool:
+    """Hands out isolated Scarb projects and recycles them between requests.
+
+    Workspaces are created from the server's Scarb.toml template on demand.
+    Released workspaces are kept (up to max_idle) for reuse; the rest are
+    deleted.
+    """
+
+    def __init__(self, template_dir: str = SERVER_DIR, root: str = None, max_idle: int = None):
+        self.template_dir = template_dir
+        root = root or os.getenv('BLOCKS_WORKSPACE_ROOT')
+        self.owns_root = root is None
+        self.root = root or tempfile.mkdtemp(prefix='blocks-workspaces-')
+        self.max_idle = max_idle if max_idle is not None else int(os.getenv('BLOCKS_MAX_IDLE_WORKSPACES', os.cpu_count() or 4))
+        self.idle = []
+        self.lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def create(self) -> Workspace:
+        path = os.path.join(self.root, uuid.uuid4().hex)
+        os.makedirs(os.path.join(path, 'src'))
+        for name in TEMPLATE_FILES:
+            source = os.path.join(self.template_dir, name)
+            if os.path.exists(source):
+                link_or_copy(source, os.path.join(path, name))
+        return Workspace(path)
+
+    def checkout(self) -> Workspace:
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        return self.create()
+
+    def release(self, workspace: Workspace):
+        workspace.reset()
+        with self.lock:
+            if len(self.idle) < self.max_idle:
+                self.idle.append(workspace)
+                return
+        shutil.rmtree(workspace.path, ignore_errors=True)
+
+    @contextmanager
+    def acquire(self):
+        workspace = self.checkout()
+        try:
+            yield workspace
+        finally:
+            self.release(workspace)
+
+    def cleanup(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for workspace in idle:
+            shutil.rmtree(workspace.path, ignore_errors=True)
+        if self.owns_root:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_workspace_pool() -> WorkspacePool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkspacePool()
+            atexit.register(_pool.cleanup)
+        return _pool